@@ -9,6 +9,73 @@ interface ChatMessage {
   content: string;
 }
 
+// reads the server-sent events of /bot/stream, or of /turn/stream when content is given (the user
+// message is stored with the reply and comes back as a "user" event); resolves with the persisted bot message.
+// with the user message's idempotency key, a retry returns the reply already generated for it
+const streamBotMessage = async (
+  sessionId: string,
+  onText: (text: string) => void,
+  idempotencyKey?: string,
+  content?: string,
+  onUserMessage?: (message: ChatMessage) => void,
+): Promise<ChatMessage> => {
+  const path = content === undefined ? 'bot/stream' : 'turn/stream';
+  const response = await fetch(`http://localhost:8000/chat/${sessionId}/${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
+    },
+    ...(content === undefined ? {} : { body: JSON.stringify({ content }) }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error('failed to fetch response.');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === 'token') {
+        text += payload.text;
+        onText(text);
+      } else if (event === 'reset') {
+        text = '';
+        onText(text);
+      } else if (event === 'user') {
+        onUserMessage?.(payload as ChatMessage);
+      } else if (event === 'message') {
+        return payload as ChatMessage;
+      } else if (event === 'error') {
+        throw new Error(payload.detail || 'failed to fetch response.');
+      }
+    }
+  }
+
+  throw new Error('stream ended without a message.');
+};
+
 export interface SessionChatProps {
   inputRef: React.RefObject<HTMLInputElement>;
   message: string;
@@ -29,7 +96,10 @@ const SessionChat: React.FC<SessionChatProps> = ({
   const [isWaitingForResponse, setIsWaitingForResponse] = useState(true);
   const [messagesList, setMessagesList] = useState<ChatMessage[]>([]);
   const [showTyping, setShowTyping] = useState(false);
+  const [streamingText, setStreamingText] = useState('');
   const isInitializingRef = useRef(false);
+  // kept until the send succeeds, so resending the same text after a failure reuses the key
+  const pendingSendRef = useRef<{ content: string; key: string } | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const messagesAreaRef = useRef<HTMLDivElement>(null);
 
@@ -69,18 +139,9 @@ const SessionChat: React.FC<SessionChatProps> = ({
 
         if (needsBotResponse) {
           setShowTyping(true);
-          const response = await fetch(`http://localhost:8000/chat/${sessionId}/bot/new`, {
-            method: 'POST',
-            headers: {
-              'Content-Type': 'application/json',
-            },
+          const botMessage = await streamBotMessage(sessionId, (text) => {
+            if (isMounted) setStreamingText(text);
           });
-
-          if (!response.ok) {
-            throw new Error('failed to fetch response.');
-          }
-
-          const botMessage = await response.json();
           if (isMounted) {
             setMessagesList((prev) => [...prev, botMessage]);
           }
@@ -89,6 +150,7 @@ const SessionChat: React.FC<SessionChatProps> = ({
       } finally {
         if (isMounted) {
           setShowTyping(false);
+          setStreamingText('');
           setIsWaitingForResponse(false);
         }
         isInitializingRef.current = false;
@@ -160,44 +222,44 @@ const SessionChat: React.FC<SessionChatProps> = ({
     setMessage('');
     setIsWaitingForResponse(true);
 
-    try {
-      const userMessageRes = await fetch(`http://localhost:8000/chat/${sessionId}/new`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          content: messageContent,
-          sender: 'user',
-        }),
-      });
-
-      if (!userMessageRes.ok) {
-        throw new Error('Failed to send message');
-      }
-
-      const userMessage = await userMessageRes.json();
-      setMessagesList((prev) => [...prev, userMessage]);
+    if (pendingSendRef.current?.content !== messageContent) {
+      pendingSendRef.current = { content: messageContent, key: crypto.randomUUID() };
+    }
+    const idempotencyKey = pendingSendRef.current.key;
+
+    // shown right away; the server stores the message together with the reply in one turn
+    const pendingMessage: ChatMessage = {
+      message_id: -Date.now(),
+      session_id: Number(sessionId),
+      sender: 'user',
+      content: messageContent,
+    };
+    setMessagesList((prev) => [...prev, pendingMessage]);
 
+    try {
       setShowTyping(true);
-      const botResponseRes = await fetch(`http://localhost:8000/chat/${sessionId}/bot/new`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-      });
-
-      if (!botResponseRes.ok) {
-        throw new Error('Failed to get bot response');
-      }
-
-      const botMessage = await botResponseRes.json();
+      const botMessage = await streamBotMessage(
+        sessionId,
+        setStreamingText,
+        idempotencyKey,
+        messageContent,
+        (userMessage) =>
+          // a retried send returns the message stored the first time
+          setMessagesList((prev) =>
+            prev
+              .filter((m) => m.message_id !== userMessage.message_id)
+              .map((m) => (m.message_id === pendingMessage.message_id ? userMessage : m)),
+          ),
+      );
       setMessagesList((prev) => [...prev, botMessage]);
+      pendingSendRef.current = null;
     } catch (error) {
+      setMessagesList((prev) => prev.filter((m) => m.message_id !== pendingMessage.message_id));
       setMessage(messageContent);
       alert('Failed to send message. Please try again.');
     } finally {
       setShowTyping(false);
+      setStreamingText('');
       setIsWaitingForResponse(false);
     }
   };
@@ -243,7 +305,7 @@ const SessionChat: React.FC<SessionChatProps> = ({
     if (messagesEndRef.current) {
       messagesEndRef.current.scrollIntoView({ behavior: 'smooth' });
     }
-  }, [messagesList, showTyping]);
+  }, [messagesList, showTyping, streamingText]);
 
   // Focus input when AI is done speaking
   useEffect(() => {
@@ -271,7 +333,17 @@ const SessionChat: React.FC<SessionChatProps> = ({
             </div>
           );
         })}
-        {showTyping && (
+        {showTyping && streamingText && (
+          <div className="message-row bot">
+            {streamingText.split('\n').map((line: string, index: number, array: string[]) => (
+              <React.Fragment key={index}>
+                {line}
+                {index < array.length - 1 && <br />}
+              </React.Fragment>
+            ))}
+          </div>
+        )}
+        {showTyping && !streamingText && (
           <div className="message-row bot typing-row">
             <TypingIndicator />
           </div>
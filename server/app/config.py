@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+env_path = Path(__file__).parent.parent.parent / '.env'
+load_dotenv(dotenv_path=env_path)
+
+SERVER_DIR = Path(__file__).parent.parent
+DATA_DIR = Path(os.getenv("DATA_DIR", SERVER_DIR / "data"))
+
+# nhtsa makes index
+NHTSA_MAKES_TTL_SECONDS = int(os.getenv("NHTSA_MAKES_TTL_SECONDS", 24 * 60 * 60))
+NHTSA_MAKES_SNAPSHOT_PATH = Path(os.getenv("NHTSA_MAKES_SNAPSHOT_PATH", DATA_DIR / "nhtsa_makes.json"))
+
+# vin decode cache
+VIN_CACHE_SIZE = int(os.getenv("VIN_CACHE_SIZE", 10000))
+VIN_CACHE_TTL_SECONDS = int(os.getenv("VIN_CACHE_TTL_SECONDS", 30 * 24 * 60 * 60))
+VIN_CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("VIN_CACHE_NEGATIVE_TTL_SECONDS", 60 * 60))
+# how long a worker's claim on decoding a vin lasts; others wait for its result until then. covers
+# the vPIC call with its retries, and is how long a vin stays claimed if that worker dies mid-decode
+VIN_DECODE_CLAIM_SECONDS = float(os.getenv("VIN_DECODE_CLAIM_SECONDS", 30))
+
+# outbound http (nhtsa, zenquotes)
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", 3))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF_SECONDS = float(os.getenv("HTTP_RETRY_BACKOFF_SECONDS", 0.2))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", 10))
+HTTP_BREAKER_FAILURE_THRESHOLD = int(os.getenv("HTTP_BREAKER_FAILURE_THRESHOLD", 5))
+HTTP_BREAKER_RESET_SECONDS = float(os.getenv("HTTP_BREAKER_RESET_SECONDS", 30))
+
+# vpic lookups: "online" calls vpic.nhtsa.dot.gov, "offline" answers from the local snapshot store
+VPIC_MODE = os.getenv("VPIC_MODE", "online").lower()
+VPIC_STORE_PATH = Path(os.getenv("VPIC_STORE_PATH", DATA_DIR / "vpic.sqlite3"))
+
+# inspirational quote pool
+QUOTE_POOL_SIZE = int(os.getenv("QUOTE_POOL_SIZE", 50))
+QUOTE_POOL_REFILL_SECONDS = float(os.getenv("QUOTE_POOL_REFILL_SECONDS", 10 * 60))
+
+# answer unambiguous turns ("yes", "5", "personal") from templates without calling the LLM
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# prompt template version (app/prompts); recorded with each completion's token usage
+PROMPT_VERSION = os.getenv("PROMPT_VERSION", "v1")
+
+# pre-generated opening messages for new sessions
+INTRO_POOL_SIZE = int(os.getenv("INTRO_POOL_SIZE", 8))
+INTRO_POOL_REFRESH_SECONDS = float(os.getenv("INTRO_POOL_REFRESH_SECONDS", 6 * 60 * 60))
+
+# conversation context: older turns beyond the token budget are replaced by a state summary from the db
+CONTEXT_MAX_MESSAGES = int(os.getenv("CONTEXT_MAX_MESSAGES", 15))
+CONTEXT_MIN_MESSAGES = int(os.getenv("CONTEXT_MIN_MESSAGES", 2))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 3000))
+
+# tool calls from one completion run concurrently and share this deadline
+TOOL_DEADLINE_SECONDS = float(os.getenv("TOOL_DEADLINE_SECONDS", 8))
+
+# llm backend: "openai", "stub" (offline, deterministic), "record" (openai, captured to a file) or "replay" (serves the captures)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", 0))
+LLM_STUB_JITTER_MS = float(os.getenv("LLM_STUB_JITTER_MS", 0))
+LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", 0))
+LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED", 0))
+LLM_RECORDINGS_PATH = Path(os.getenv("LLM_RECORDINGS_PATH", DATA_DIR / "llm_recordings.jsonl"))
+
+# how long a bot turn waits for another worker's turn on the same session before giving up; also how
+# long that worker's lease on the session lasts if it dies mid-turn
+TURN_LOCK_TIMEOUT_SECONDS = float(os.getenv("TURN_LOCK_TIMEOUT_SECONDS", 120))
@@ -0,0 +1,18 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+# the server directory, where alembic.ini and migrations/ live
+SERVER_DIR = Path(__file__).parent.parent.parent
+
+
+def config() -> Config:
+    alembic_config = Config(str(SERVER_DIR / "alembic.ini"))
+    alembic_config.attributes["configure_logger"] = False
+    return alembic_config
+
+
+def upgrade():
+    """Brings the database to the latest schema. Databases created before migrations are adopted by the first one."""
+    command.upgrade(config(), "head")
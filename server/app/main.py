@@ -1,31 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.db.database import engine, Base
-from sqlalchemy import text
+from app.db import migrations
+from app.config import VPIC_MODE
 
 from app.routers.chat import router as chat_router
+from app.routers.metrics import router as metrics_router
+from app.routers.session import router as session_router
+from app.services import intro_pool, makes_index, quote_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    
-    try:
-        with engine.begin() as conn:
-            result = conn.execute(text("""
-                SELECT EXISTS (
-                    SELECT 1 FROM pg_enum 
-                    WHERE enumlabel = 'vin_or_year_make_body' 
-                    AND enumtypid = (SELECT oid FROM pg_type WHERE typname = 'vehiclestep')
-                );
-            """))
-            exists = result.scalar()
-            
-            if not exists:
-                conn.execute(text("ALTER TYPE vehiclestep ADD VALUE 'vin_or_year_make_body'"))
-    except Exception:
-        pass
+    # tables, columns and indexes come from migrations/, see alembic.ini
+    migrations.upgrade()
+
+    if VPIC_MODE != "offline":
+        makes_index.start()
+    quote_pool.start()
+    intro_pool.start()
     
     yield
 
@@ -39,4 +32,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(chat_router)
\ No newline at end of file
+app.include_router(chat_router)
+app.include_router(metrics_router)
+app.include_router(session_router)
\ No newline at end of file
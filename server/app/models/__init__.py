@@ -2,6 +2,9 @@ from app.db.database import Base
 from app.models.message import Message
 from app.models.session import Session
 from app.models.vehicle import Vehicle
+from app.models.vin_decode import VinDecode
+from app.models.vin_decode_claim import VinDecodeClaim
+from app.models.llm_usage import LlmUsage
 
-__all__ = ["Base", "Message", "Session", "Vehicle"]
+__all__ = ["Base", "Message", "Session", "Vehicle", "VinDecode", "VinDecodeClaim", "LlmUsage"]
 
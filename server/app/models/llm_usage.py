@@ -0,0 +1,17 @@
+from app.db.database import Base
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, func
+
+class LlmUsage(Base):
+    __tablename__ = "llm_usage"
+
+    usage_id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
+    session_id = Column(Integer, ForeignKey("sessions.session_id"), nullable=True, index=True) # null for background generation (intro pool)
+
+    # one row per completion; a turn with a tool round trip has two
+    model = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False)
+    cached_tokens = Column(Integer, nullable=False) # part of prompt_tokens served from the provider's prefix cache
+    completion_tokens = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
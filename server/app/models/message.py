@@ -1,5 +1,5 @@
 from app.db.database import Base
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 from sqlalchemy import Enum as SAEnum
 from app.enums.sender import Sender
 
@@ -9,4 +9,13 @@ class Message(Base):
     message_id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
     session_id = Column(Integer, ForeignKey("sessions.session_id"), nullable=False)
     sender = Column(SAEnum(Sender), nullable=False)
-    content = Column(String, nullable=False)
\ No newline at end of file
+    content = Column(String, nullable=False)
+    idempotency_key = Column(String(255), nullable=True) # client-supplied on POST /chat/{id}/new; a retry returns the stored row
+
+    __table_args__ = (
+        Index("ix_messages_session_idempotency_key", "session_id", "idempotency_key", unique=True),
+        # the turn's message window and the last message id, newest first
+        Index("ix_messages_session_message", "session_id", "message_id"),
+        # counts and lookups by sender
+        Index("ix_messages_session_sender_message", "session_id", "sender", "message_id"),
+    )
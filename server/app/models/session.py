@@ -1,6 +1,8 @@
 from app.db.database import Base
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy import Enum as SAEnum
+from sqlalchemy.orm import relationship
 
 from app.enums.chat_step import ChatStep
 from app.enums.license_status import LicenseStatus
@@ -20,4 +22,13 @@ class Session(Base):
     full_name = Column(String, nullable=True)
     email = Column(String, nullable=True)
     license_type = Column(SAEnum(LicenseType), nullable=True)
-    license_status = Column(SAEnum(LicenseStatus), nullable=True)
\ No newline at end of file
+    license_status = Column(SAEnum(LicenseStatus), nullable=True)
+
+    # everything above plus the vehicles as one document, maintained by services/session_summary.py
+    summary = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+
+    # set while a worker runs a bot turn for the session, see services/turn_lock.py
+    turn_lease_until = Column(DateTime(timezone=True), nullable=True)
+
+    # read side only: turns load it eagerly, new vehicles are added as rows of their own
+    vehicles = relationship("Vehicle", order_by="Vehicle.vehicle_id", viewonly=True)
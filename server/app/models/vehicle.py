@@ -1,5 +1,5 @@
 from app.db.database import Base
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Boolean
 from sqlalchemy import Enum as SAEnum
 from app.enums.license_status import LicenseStatus
 from app.enums.license_type import LicenseType
@@ -26,3 +26,8 @@ class Vehicle(Base):
 
     license_type = Column(SAEnum(LicenseType), nullable=True)
     license_status = Column(SAEnum(LicenseStatus), nullable=True) # personal or commercial license type
+
+    __table_args__ = (
+        # a session's vehicles in order, as the turn context loads them
+        Index("ix_vehicles_session_vehicle", "session_id", "vehicle_id"),
+    )
@@ -0,0 +1,12 @@
+from app.db.database import Base
+from sqlalchemy import Column, String, Boolean, DateTime, JSON
+
+class VinDecode(Base):
+    __tablename__ = "vin_decodes"
+
+    vin = Column(String(17), primary_key=True, nullable=False)
+    valid = Column(Boolean, nullable=False)
+    result = Column(JSON, nullable=False) # validate_vin payload as returned to the tool call
+
+    decoded_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False) # negative results expire much sooner
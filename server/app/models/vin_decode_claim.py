@@ -0,0 +1,9 @@
+from app.db.database import Base
+from sqlalchemy import Column, String, DateTime
+
+class VinDecodeClaim(Base):
+    __tablename__ = "vin_decode_claims"
+
+    # the worker decoding a vin holds its row until the result is stored (postgres only, see services/vin_cache.py)
+    vin = Column(String(17), primary_key=True, nullable=False)
+    claimed_until = Column(DateTime(timezone=True), nullable=False) # a worker that dies mid-decode lets it expire
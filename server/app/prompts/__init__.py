@@ -0,0 +1,84 @@
+from types import ModuleType
+from typing import Dict
+
+from app.config import PROMPT_VERSION
+from app.enums.chat_step import ChatStep
+from app.models.session import Session as SessionModel
+from app.prompts import v1
+
+# each version is a module with VERSION, SYSTEM_PREFIX, INTRO, ASK_ONLY and STEP_TEMPLATES.
+# edit a template by adding a new version so recorded token usage stays comparable
+PROMPTS: Dict[str, ModuleType] = {v1.VERSION: v1}
+
+if PROMPT_VERSION not in PROMPTS:
+    raise ValueError(f"Unknown PROMPT_VERSION {PROMPT_VERSION!r}. Expected one of: {', '.join(PROMPTS)}")
+
+_active = PROMPTS[PROMPT_VERSION]
+SYSTEM_PREFIX: str = _active.SYSTEM_PREFIX
+
+
+def _session_summary(session: SessionModel, vehicle_count: int) -> str:
+    parts = []
+    if session.zip_code:
+        parts.append(f"Zip Code: {session.zip_code}")
+    if session.full_name:
+        parts.append(f"Full Name: {session.full_name}")
+    if session.email:
+        parts.append(f"Email: {session.email}")
+    if session.license_type:
+        parts.append(f"License Type: {session.license_type.value}")
+    if session.license_status:
+        parts.append(f"License Status: {session.license_status.value}")
+    if vehicle_count:
+        parts.append(f"Vehicles: {vehicle_count} vehicle(s) added")
+    return "\n".join(parts) if parts else "No additional information collected."
+
+
+def _collected_info(session: SessionModel) -> str:
+    parts = []
+    if session.zip_code:
+        parts.append(f"✓ Zip Code: {session.zip_code}")
+    if session.full_name:
+        parts.append(f"✓ Full Name: {session.full_name}")
+    if session.email:
+        parts.append(f"✓ Email: {session.email}")
+    if session.license_type:
+        parts.append(f"✓ License Type: {session.license_type.value} (ALREADY COLLECTED - DO NOT ASK AGAIN)")
+    return "\n".join(parts) if parts else "No information collected yet."
+
+
+def render_step(session: SessionModel, vehicle_count: int, has_messages: bool, ask_only: bool = False) -> str:
+    """
+    The per-turn instructions for the session's current step; sent after the conversation.
+    ask_only is for a turn that already advanced the state: the model only asks the new step's question.
+    """
+    templates = _active.STEP_TEMPLATES
+    step = session.current_step
+
+    if step == ChatStep.license_type:
+        already_collected = ""
+        if session.license_type:
+            already_collected = f"CRITICAL: License type has ALREADY been collected: {session.license_type.value}. This should not happen. Move to license_status step."
+        text = templates["license_type"].substitute(already_collected=already_collected)
+    elif step == ChatStep.license_status and session.license_status:
+        text = templates["license_status_complete"].substitute(
+            license_status=session.license_status.value,
+            session_summary=_session_summary(session, vehicle_count)
+        )
+    elif step == ChatStep.license_status:
+        text = templates["license_status"].substitute(
+            collected_info=_collected_info(session),
+            license_type=session.license_type.value if session.license_type else "N/A"
+        )
+    elif step == ChatStep.vehicles and session.vehicle_step:
+        text = templates[session.vehicle_step.value].substitute()
+    elif step == ChatStep.vehicles:
+        text = templates["add_another_vehicle" if vehicle_count else "add_vehicle"].substitute()
+    else:
+        text = templates[step.value].substitute()
+
+    if not has_messages:
+        text = _active.INTRO.substitute() + text
+    if ask_only:
+        text += _active.ASK_ONLY.substitute()
+    return text
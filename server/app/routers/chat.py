@@ -1,25 +1,23 @@
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-import json
 import requests
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, run_read, AsyncSessionLocal
 from app.db.database import engine
-from app.schemas.message import MessageCreate, MessageResponse
+from app.schemas.message import MessageCreate, MessageResponse, TurnResponse
+from app.schemas.fleet import FleetImportRequest, FleetImportResponse
+from app.schemas.session import SessionSummary
 from app.services.session import create_session
 from app.enums.sender import Sender
-from app.enums.chat_step import ChatStep
-from app.enums.vehicle_step import VehicleStep
-from app.enums.license_type import LicenseType
-from app.enums.license_status import LicenseStatus
-from app.enums.vehicle_use import VehicleUse
-from app.models.session import Session as SessionModel
-from app.models.vehicle import Vehicle
 from app.models.message import Message
 from app.services import messaging as message_service
-from app.services import session as session_service
-from app.services import vehicle as vehicle_service
+from app.services import fleet as fleet_service
+from app.services import conversation, session_summary, turn_context, turn_lock
+from app.services.turn_context import TurnContext
+from app.services.streaming import sse
 
 router = APIRouter(
     prefix="/chat",
@@ -36,642 +34,232 @@ def add_message(
     session_id: int,
     content: str = Body(...),
     sender: str = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
 ):
     sender_enum = Sender.bot if sender == "bot" else Sender.user
-    message = message_service.add_message(session_id, sender_enum, content, db)
+    message = message_service.add_message(session_id, sender_enum, content, db, idempotency_key=idempotency_key)
+    if message.sender != sender_enum or message.content != content:
+        raise HTTPException(status_code=409, detail="Idempotency-Key was already used for a different message.")
     return message
 
-def get_session_summary(session_id: int, db: Session) -> str:
-    """Get a formatted summary of all session data for agent handoff"""
-    session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-    if not session:
-        return "No session data available."
-    
-    summary_parts = []
-    summary_parts.append("=== SESSION DATA SUMMARY ===")
-    summary_parts.append(f"Session ID: {session_id}")
-    
-    if session.zip_code:
-        summary_parts.append(f"Zip Code: {session.zip_code}")
-    if session.full_name:
-        summary_parts.append(f"Full Name: {session.full_name}")
-    if session.email:
-        summary_parts.append(f"Email: {session.email}")
-    if session.license_type:
-        summary_parts.append(f"License Type: {session.license_type.value}")
-    if session.license_status:
-        summary_parts.append(f"License Status: {session.license_status.value}")
-    
-    vehicles = db.query(Vehicle).filter(Vehicle.session_id == session_id).all()
-    if vehicles:
-        summary_parts.append(f"\nVehicles ({len(vehicles)}):")
-        for idx, vehicle in enumerate(vehicles, 1):
-            vehicle_parts = []
-            if vehicle.vin:
-                vehicle_parts.append(f"VIN: {vehicle.vin}")
-            if vehicle.year and vehicle.make and vehicle.body_type:
-                vehicle_parts.append(f"Vehicle: {vehicle.year} {vehicle.make} {vehicle.body_type}")
-            elif vehicle.year and vehicle.make:
-                vehicle_parts.append(f"Vehicle: {vehicle.year} {vehicle.make}")
-            if vehicle.vehicle_use:
-                vehicle_parts.append(f"Use: {vehicle.vehicle_use.value}")
-            if vehicle.blind_spot_warning_equipped is not None:
-                vehicle_parts.append(f"Blind Spot Warning: {'Yes' if vehicle.blind_spot_warning_equipped else 'No'}")
-            if vehicle.days_per_week:
-                vehicle_parts.append(f"Commuting Days/Week: {vehicle.days_per_week}")
-            if vehicle.one_way_miles:
-                vehicle_parts.append(f"One-way Miles: {vehicle.one_way_miles}")
-            if vehicle.annual_mileage:
-                vehicle_parts.append(f"Annual Mileage: {vehicle.annual_mileage}")
-            
-            if vehicle_parts:
-                summary_parts.append(f"  Vehicle {idx}: " + ", ".join(vehicle_parts))
-    
-    return "\n".join(summary_parts)
+@router.get("/{session_id}/summary", response_model=SessionSummary)
+def get_summary(session_id: int, db: Session = Depends(get_db)):
+    """Everything collected so far, for an agent handoff: a single-row read of the stored summary document."""
+    summary = session_summary.load(session_id, db)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    # a session without a stored document gets it written on this read
+    db.commit()
+    return SessionSummary(session_id=session_id, **summary)
 
 @router.post("/{session_id}/bot/new", response_model=MessageResponse)
-def add_bot_message(
+async def add_bot_message(
     session_id: int,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-    if session:
-        db.refresh(session)
-    
-    if session and session.license_status and session.current_step == ChatStep.license_status:
-        pass
-    
-    if session and session.current_step in [ChatStep.license_type, ChatStep.license_status]:
-        pass
-    
-    session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-    if session:
-        db.refresh(session)
-    
+    # a double click or a retry while the turn is running gets the same reply instead of a second turn;
+    # with the user message's Idempotency-Key, a retry after the turn finished gets it too
+    since = await run_read(db, lambda sync_db: _turn_start(session_id, idempotency_key, sync_db))
+    loaded = _TurnLoader(session_id, since, db)
+    async with turn_lock.single_flight(session_id, loaded.completed) as flight:
+        if not flight.leader:
+            return flight.result
+        flight.result = await _run_bot_turn(session_id, db, loaded.turn)
+        return flight.result
+
+async def _run_bot_turn(session_id: int, db: AsyncSession, turn: Optional[TurnContext]) -> MessageResponse:
     try:
-        content = message_service.get_bot_response(session_id, db)
-        if not content:
-            content = json.dumps({
-                "content": "I encountered an error with your request. Please try again momentarily.",
-                "valid": False,
-                "extracted": "none"
-            })
-    except Exception as e:
-        content = json.dumps({
-            "content": "I encountered an error with your request. Please try again momentarily.",
-            "valid": False,
-            "extracted": "none"
-        })
-    
+        async for kind, value in conversation.arun_turn(session_id, db, turn=turn):
+            if kind == "message":
+                return value
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Session not found.")
+
+@router.post("/{session_id}/bot/stream")
+async def stream_bot_message(
+    session_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+):
+    """
+    Same turn as /bot/new over server-sent events: "token" events carry the reply text as it is
+    generated, "reset" discards text streamed so far, and the persisted message closes the stream
+    as a "message" event (or "error" if it could not be saved). A request that joins a turn
+    already in flight, or replays a finished one by Idempotency-Key, only gets the "message" event.
+    """
+    return StreamingResponse(
+        _bot_message_events(session_id, idempotency_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _bot_message_events(session_id: int, idempotency_key: Optional[str] = None):
+    # the session outlives the request handler, so the generator owns it
+    async with AsyncSessionLocal() as db:
+        since = await run_read(db, lambda sync_db: _turn_start(session_id, idempotency_key, sync_db))
+        loaded = _TurnLoader(session_id, since, db)
+        async with turn_lock.single_flight(session_id, loaded.completed) as flight:
+            if not flight.leader:
+                yield sse("message", flight.result.model_dump(mode="json"))
+                return
+            async for event in _turn_events(session_id, db, loaded, flight):
+                yield event
+
+async def _turn_events(session_id: int, db: AsyncSession, loaded: "_TurnLoader", flight: turn_lock.Flight, with_user: bool = False):
     try:
-        json_content = content.strip()
-        if json_content.startswith("```"):
-            json_content = json_content.split("```")[1]
-            if json_content.startswith("json"):
-                json_content = json_content[4:]
-        json_content = json_content.strip()
-        
-        try:
-            parsed = json.loads(json_content)
-        except Exception as e:
-            message = message_service.add_message(session_id, Sender.bot, content, db)
-            return message
-        
-        extracted = parsed.get("extracted")
-        valid = parsed.get("valid")
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step is None:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content_lower = last_user_msg.content.lower().strip()
-                
-                if user_content_lower in ["no", "n", "nah", "nope"] or (user_content_lower.startswith("no") and "yes" not in user_content_lower):
-                    extracted = "false"
-                    valid = True
-                elif user_content_lower in ["yes", "y", "yeah", "yea", "sure", "ok", "okay", "yep"] or (user_content_lower.startswith("yes") and "no" not in user_content_lower):
-                    extracted = "true"
-                    valid = True
-        
-        if session and session.current_step == ChatStep.license_type:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content_lower = last_user_msg.content.lower().strip()
-                user_content_clean = user_content_lower.rstrip('?.,!').strip()
-                user_has_personal = "personal" in user_content_lower
-                user_has_commercial = "commercial" in user_content_lower
-                user_has_foreign = "foreign" in user_content_lower
-                
-                if (user_content_clean == "personal" or 
-                    user_content_lower.startswith("personal") or 
-                    (user_has_personal and not user_has_commercial and not user_has_foreign)):
-                    extracted = "personal"
-                    valid = True
-                elif (user_content_clean == "commercial" or 
-                      user_content_lower.startswith("commercial") or 
-                      (user_has_commercial and not user_has_personal and not user_has_foreign)):
-                    extracted = "commercial"
-                    valid = True
-                elif (user_content_clean == "foreign" or 
-                      user_content_lower.startswith("foreign") or 
-                      (user_has_foreign and not user_has_personal and not user_has_commercial)):
-                    extracted = "foreign"
-                    valid = True
-        
-        if session and session.current_step == ChatStep.license_status:
-            if session.license_status:
-                valid = False
-                extracted = "none"
+        async for kind, value in conversation.arun_turn(session_id, db, stream=True, turn=loaded.turn):
+            if kind == "token":
+                yield sse("token", {"text": value})
+            elif kind == "reset":
+                yield sse("reset", {})
             else:
-                last_user_msg = db.query(Message).filter(
-                    Message.session_id == session_id,
-                    Message.sender == Sender.user
-                ).order_by(Message.message_id.desc()).first()
-                
-                if last_user_msg:
-                    user_content_lower = last_user_msg.content.lower().strip()
-                    
-                    if user_content_lower == "valid" or (user_content_lower.startswith("valid") and "suspended" not in user_content_lower):
-                        extracted = "valid"
-                        valid = True
-                    elif user_content_lower == "suspended" or "suspended" in user_content_lower:
-                        extracted = "suspended"
-                        valid = True
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step == VehicleStep.vin_or_year_make_body:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content = last_user_msg.content.strip()
-                
-                # Check if it's a VIN (17 characters, alphanumeric)
-                if len(user_content) == 17 and user_content.replace("-", "").replace(" ", "").isalnum():
-                    extracted = user_content.replace("-", "").replace(" ", "")
-                    valid = True
-                else:
-                    # Try to extract Year Make BodyType
-                    import re
-                    
-                    # Common body types for validation
-                    body_types_list = ['sedan', 'suv', 'truck', 'coupe', 'hatchback', 'wagon', 'van', 'convertible', 'pickup', 'minivan', 'sport']
-                    
-                    # Pattern: year (4 digits) followed by make (one or two words) followed by body type
-                    flexible_pattern = r'\b(19\d{2}|20[0-2]\d)\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)\s+([A-Za-z]+)'
-                    matches = list(re.finditer(flexible_pattern, user_content, re.IGNORECASE))
-                    
-                    if matches:
-                        for match in matches:
-                            year = match.group(1)
-                            make = match.group(2).strip()
-                            body_type = match.group(3).strip()
-                            
-                            # If body type is in our list, or if we have at least 3 words, accept it
-                            if body_type.lower() in body_types_list or (len(user_content.split()) >= 3 and len(body_type) > 2):
-                                extracted = f"{year} {make} {body_type}"
-                                valid = True
-                                break
-                    else:
-                        # Fallback: try simple split if pattern doesn't match
-                        parts = user_content.split()
-                        if len(parts) >= 3:
-                            try:
-                                # Check if first part is a year
-                                year_int = int(parts[0])
-                                if 1900 <= year_int <= 2029:
-                                    extracted = user_content
-                                    valid = True
-                            except ValueError:
-                                pass
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step == VehicleStep.use:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content_lower = last_user_msg.content.lower().strip()
-                user_content_clean = user_content_lower.rstrip('?.,!').strip()
-                
-                vehicle_use_value = None
-                if user_content_clean in ["commuting", "commercial", "farming", "business"]:
-                    vehicle_use_value = user_content_clean
-                elif user_content_lower.startswith("commuting"):
-                    vehicle_use_value = "commuting"
-                elif user_content_lower.startswith("commercial"):
-                    vehicle_use_value = "commercial"
-                elif user_content_lower.startswith("farming"):
-                    vehicle_use_value = "farming"
-                elif user_content_lower.startswith("business"):
-                    vehicle_use_value = "business"
-                elif "commuting" in user_content_lower and "commercial" not in user_content_lower and "farming" not in user_content_lower and "business" not in user_content_lower:
-                    vehicle_use_value = "commuting"
-                elif "commercial" in user_content_lower and "commuting" not in user_content_lower and "farming" not in user_content_lower and "business" not in user_content_lower:
-                    vehicle_use_value = "commercial"
-                elif "farming" in user_content_lower and "commuting" not in user_content_lower and "commercial" not in user_content_lower and "business" not in user_content_lower:
-                    vehicle_use_value = "farming"
-                elif "business" in user_content_lower and "commuting" not in user_content_lower and "commercial" not in user_content_lower and "farming" not in user_content_lower:
-                    vehicle_use_value = "business"
-                
-                if vehicle_use_value:
-                    vehicle = db.query(Vehicle).filter(
-                        Vehicle.session_id == session_id,
-                        Vehicle.vehicle_use.is_(None)
-                    ).order_by(Vehicle.vehicle_id.desc()).first()
-                    if not vehicle:
-                        vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = vehicle_service.create_vehicle(db, session_id)
-                    
-                    try:
-                        vehicle_use_enum = VehicleUse(vehicle_use_value)
-                        vehicle_service.save(vehicle.vehicle_id, db, "vehicle_use", vehicle_use_enum)
-                        session_service.save(session_id, db, "vehicle_step", VehicleStep.blind_spot)
-                        return add_bot_message(session_id, db)
-                    except ValueError:
-                        pass
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step == VehicleStep.commuting_days:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content = last_user_msg.content.strip()
-                try:
-                    days = int(user_content)
-                    if 1 <= days <= 7:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.vehicle_use == VehicleUse.commuting,
-                            Vehicle.days_per_week.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(
-                                Vehicle.session_id == session_id,
-                                Vehicle.days_per_week.is_(None)
-                            ).order_by(Vehicle.vehicle_id.desc()).first()
-                            if not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                        vehicle_service.save(vehicle.vehicle_id, db, "days_per_week", days)
-                        session_service.save(session_id, db, "vehicle_step", VehicleStep.commuting_miles)
-                        db.refresh(session)
-                        return add_bot_message(session_id, db)
-                except ValueError:
-                    pass
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step == VehicleStep.commuting_miles:
-            # Check if we have a vehicle with days_per_week set but one_way_miles not set
-            vehicle = db.query(Vehicle).filter(
-                Vehicle.session_id == session_id,
-                Vehicle.vehicle_use == VehicleUse.commuting,
-                Vehicle.days_per_week.isnot(None),
-                Vehicle.one_way_miles.is_(None)
-            ).order_by(Vehicle.vehicle_id.desc()).first()
-            
-            if vehicle:
-                # Check if the last bot message was asking about one-way miles
-                # If not, we're in a recursive call right after saving days, so skip processing
-                last_bot_msg = db.query(Message).filter(
-                    Message.session_id == session_id,
-                    Message.sender == Sender.bot
-                ).order_by(Message.message_id.desc()).first()
-                
-                # Only process user message if the last bot message was asking about miles
-                # This prevents processing the same user message twice (once as days, once as miles)
-                if last_bot_msg and ("one-way miles" in last_bot_msg.content.lower() or "one way miles" in last_bot_msg.content.lower() or "miles is your commute" in last_bot_msg.content.lower()):
-                    last_user_msg = db.query(Message).filter(
-                        Message.session_id == session_id,
-                        Message.sender == Sender.user
-                    ).order_by(Message.message_id.desc()).first()
-                    
-                    if last_user_msg:
-                        user_content = last_user_msg.content.strip()
-                        try:
-                            miles = int(user_content)
-                            if miles > 0:
-                                vehicle_service.save(vehicle.vehicle_id, db, "one_way_miles", miles)
-                                session_service.save(session_id, db, "vehicle_step", None)
-                                session_service.save(session_id, db, "current_step", ChatStep.vehicles)
-                                return add_bot_message(session_id, db)
-                        except ValueError:
-                            pass
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step == VehicleStep.annual_mileage:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content = last_user_msg.content.strip()
-                try:
-                    mileage = int(user_content)
-                    if mileage > 0:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.vehicle_use.in_([VehicleUse.commercial, VehicleUse.farming, VehicleUse.business]),
-                            Vehicle.annual_mileage.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(
-                                Vehicle.session_id == session_id,
-                                Vehicle.annual_mileage.is_(None)
-                            ).order_by(Vehicle.vehicle_id.desc()).first()
-                            if not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                        vehicle_service.save(vehicle.vehicle_id, db, "annual_mileage", mileage)
-                        session_service.save(session_id, db, "vehicle_step", None)
-                        session_service.save(session_id, db, "current_step", ChatStep.vehicles)
-                        return add_bot_message(session_id, db)
-                except ValueError:
-                    pass
-        
-        if session and session.current_step == ChatStep.vehicles and session.vehicle_step == VehicleStep.blind_spot:
-            last_user_msg = db.query(Message).filter(
-                Message.session_id == session_id,
-                Message.sender == Sender.user
-            ).order_by(Message.message_id.desc()).first()
-            
-            if last_user_msg:
-                user_content_lower = last_user_msg.content.lower().strip()
-                
-                blind_spot_value = None
-                if user_content_lower in ["yes", "y", "yeah", "yea", "sure", "ok", "okay", "yep"] or (user_content_lower.startswith("yes") and "no" not in user_content_lower):
-                    blind_spot_value = True
-                elif user_content_lower in ["no", "n", "nah", "nope"] or (user_content_lower.startswith("no") and "yes" not in user_content_lower):
-                    blind_spot_value = False
-                
-                if blind_spot_value is not None:
-                    vehicle = db.query(Vehicle).filter(
-                        Vehicle.session_id == session_id,
-                        Vehicle.vehicle_use.isnot(None),
-                        Vehicle.blind_spot_warning_equipped.is_(None)
-                    ).order_by(Vehicle.vehicle_id.desc()).first()
-                    if not vehicle:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.blind_spot_warning_equipped.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = vehicle_service.create_vehicle(db, session_id)
-                    db.refresh(vehicle)
-                    vehicle_service.save(vehicle.vehicle_id, db, "blind_spot_warning_equipped", blind_spot_value)
-                    db.refresh(vehicle)
-                    if vehicle.vehicle_use == VehicleUse.commuting:
-                        session_service.save(session_id, db, "vehicle_step", VehicleStep.commuting_days)
-                    else:
-                        session_service.save(session_id, db, "vehicle_step", VehicleStep.annual_mileage)
-                    return add_bot_message(session_id, db)
-        
-        if valid and extracted and extracted != "none" and extracted.strip():
-            session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-            
-            if session.current_step == ChatStep.zip_code:
-                session_service.save(session_id, db, "zip_code", extracted)
-                session_service.save(session_id, db, "current_step", ChatStep.full_name)
-            elif session.current_step == ChatStep.full_name:
-                session_service.save(session_id, db, "full_name", extracted)
-                session_service.save(session_id, db, "current_step", ChatStep.email)
-            elif session.current_step == ChatStep.email:
-                session_service.save(session_id, db, "email", extracted)
-                session_service.save(session_id, db, "current_step", ChatStep.vehicles)
-                session_service.save(session_id, db, "vehicle_step", None)
-            elif session.current_step == ChatStep.license_type:
-                extracted_lower = extracted.lower().strip() if extracted else ""
-                
-                if not valid or extracted_lower not in ["personal", "commercial", "foreign"]:
-                    last_user_msg = db.query(Message).filter(
-                        Message.session_id == session_id,
-                        Message.sender == Sender.user
-                    ).order_by(Message.message_id.desc()).first()
-                    
-                    if last_user_msg:
-                        user_content_lower = last_user_msg.content.lower().strip()
-                        user_content_clean = user_content_lower.rstrip('?.,!').strip()
-                        user_has_personal = "personal" in user_content_lower
-                        user_has_commercial = "commercial" in user_content_lower
-                        user_has_foreign = "foreign" in user_content_lower
-                        
-                        if user_content_clean in ["personal", "commercial", "foreign"]:
-                            extracted_lower = user_content_clean
-                            valid = True
-                        elif user_content_lower.startswith("personal"):
-                            extracted_lower = "personal"
-                            valid = True
-                        elif user_content_lower.startswith("commercial"):
-                            extracted_lower = "commercial"
-                            valid = True
-                        elif user_content_lower.startswith("foreign"):
-                            extracted_lower = "foreign"
-                            valid = True
-                        elif user_has_personal and not user_has_commercial and not user_has_foreign:
-                            extracted_lower = "personal"
-                            valid = True
-                        elif user_has_commercial and not user_has_personal and not user_has_foreign:
-                            extracted_lower = "commercial"
-                            valid = True
-                        elif user_has_foreign and not user_has_personal and not user_has_commercial:
-                            extracted_lower = "foreign"
-                            valid = True
-                
-                if extracted_lower in ["personal", "commercial", "foreign"] and valid:
-                    try:
-                        license_type_enum = LicenseType(extracted_lower)
-                        session.license_type = license_type_enum
-                        session.current_step = ChatStep.license_status
-                        db.commit()
-                        db.refresh(session)
-                        return add_bot_message(session_id, db)
-                    except ValueError:
-                        pass
-            elif session.current_step == ChatStep.license_status:
-                if session.license_status:
-                    pass
-                else:
-                    extracted_lower = extracted.lower().strip() if extracted else ""
-                    
-                    if not valid or extracted_lower not in ["valid", "suspended"]:
-                        last_user_msg = db.query(Message).filter(
-                            Message.session_id == session_id,
-                            Message.sender == Sender.user
-                        ).order_by(Message.message_id.desc()).first()
-                        
-                        if last_user_msg:
-                            user_content_lower = last_user_msg.content.lower().strip()
-                            
-                            if user_content_lower == "valid" or (user_content_lower.startswith("valid") and "suspended" not in user_content_lower):
-                                extracted_lower = "valid"
-                                valid = True
-                            elif user_content_lower == "suspended" or "suspended" in user_content_lower:
-                                extracted_lower = "suspended"
-                                valid = True
-                    
-                    if extracted_lower in ["valid", "suspended"] and valid:
-                        try:
-                            license_status_enum = LicenseStatus(extracted_lower)
-                            session.license_status = license_status_enum
-                            db.commit()
-                            db.refresh(session)
-                            return add_bot_message(session_id, db)
-                        except ValueError:
-                            pass
-            
-            session = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-            
-            if session.current_step == ChatStep.vehicles:
-                if session.vehicle_step is None:
-                    existing_vehicles = db.query(Vehicle).filter(Vehicle.session_id == session_id).count()
-                    
-                    if existing_vehicles > 0:
-                        last_bot_msg = db.query(Message).filter(
-                            Message.session_id == session_id,
-                            Message.sender == Sender.bot
-                        ).order_by(Message.message_id.desc()).first()
-                        
-                        if last_bot_msg and ("add another vehicle" in last_bot_msg.content.lower() or "add a vehicle" in last_bot_msg.content.lower()):
-                            extracted_lower = extracted.lower().strip() if extracted else ""
-                            
-                            if not valid or extracted_lower not in ["true", "false"]:
-                                last_user_msg = db.query(Message).filter(
-                                    Message.session_id == session_id,
-                                    Message.sender == Sender.user
-                                ).order_by(Message.message_id.desc()).first()
-                                
-                                if last_user_msg:
-                                    user_content_lower = last_user_msg.content.lower().strip()
-                                    
-                                    if user_content_lower in ["no", "n", "nah", "nope"] or (user_content_lower.startswith("no") and "yes" not in user_content_lower):
-                                        extracted_lower = "false"
-                                        valid = True
-                                    elif user_content_lower in ["yes", "y", "yeah", "yea", "sure", "ok", "okay", "yep"] or (user_content_lower.startswith("yes") and "no" not in user_content_lower):
-                                        extracted_lower = "true"
-                                        valid = True
-                            
-                            if extracted_lower == "true" and valid:
-                                session_service.save(session_id, db, "vehicle_step", VehicleStep.vin_or_year_make_body)
-                                return add_bot_message(session_id, db)
-                            elif extracted_lower == "false" and valid:
-                                session_service.save(session_id, db, "current_step", ChatStep.license_type)
-                                session_service.save(session_id, db, "vehicle_step", None)
-                                return add_bot_message(session_id, db)
-                    else:
-                        extracted_lower = extracted.lower().strip() if extracted else ""
-                        
-                        if not valid or extracted_lower not in ["true", "false"]:
-                            last_user_msg = db.query(Message).filter(
-                                Message.session_id == session_id,
-                                Message.sender == Sender.user
-                            ).order_by(Message.message_id.desc()).first()
-                            
-                            if last_user_msg:
-                                user_content_lower = last_user_msg.content.lower().strip()
-                                
-                                if user_content_lower in ["no", "n", "nah", "nope"] or (user_content_lower.startswith("no") and "yes" not in user_content_lower):
-                                    extracted_lower = "false"
-                                    valid = True
-                                elif user_content_lower in ["yes", "y", "yeah", "yea", "sure", "ok", "okay", "yep"] or (user_content_lower.startswith("yes") and "no" not in user_content_lower):
-                                    extracted_lower = "true"
-                                    valid = True
-                        
-                        if extracted_lower == "true" and valid:
-                            session_service.save(session_id, db, "vehicle_step", VehicleStep.vin_or_year_make_body)
-                            return add_bot_message(session_id, db)
-                        elif extracted_lower == "false" and valid:
-                            existing_vehicles = db.query(Vehicle).filter(Vehicle.session_id == session_id).count()
-                            session_service.save(session_id, db, "current_step", ChatStep.license_type)
-                            session_service.save(session_id, db, "vehicle_step", None)
-                            return add_bot_message(session_id, db)
-                elif session.vehicle_step:
-                    if session.vehicle_step == VehicleStep.vin_or_year_make_body:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.vehicle_use.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                            if vehicle and vehicle.vehicle_use and vehicle.blind_spot_warning_equipped is not None:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                            elif not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                    elif session.vehicle_step == VehicleStep.commuting_days:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.days_per_week.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                            if not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                    elif session.vehicle_step == VehicleStep.commuting_miles:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.one_way_miles.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                            if not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                    elif session.vehicle_step == VehicleStep.annual_mileage:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.annual_mileage.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                            if not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                    elif session.vehicle_step == VehicleStep.blind_spot:
-                        vehicle = db.query(Vehicle).filter(
-                            Vehicle.session_id == session_id,
-                            Vehicle.blind_spot_warning_equipped.is_(None)
-                        ).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                            if not vehicle:
-                                vehicle = vehicle_service.create_vehicle(db, session_id)
-                    else:
-                        vehicle = db.query(Vehicle).filter(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id.desc()).first()
-                        if not vehicle:
-                            vehicle = vehicle_service.create_vehicle(db, session_id)
-                    
-                    if session.vehicle_step == VehicleStep.vin_or_year_make_body:
-                        if len(extracted) == 17 and extracted.replace("-", "").replace(" ", "").isalnum():
-                            vehicle_service.save(vehicle.vehicle_id, db, "vin", extracted)
-                        else:
-                            parts = extracted.split()
-                            if len(parts) >= 3:
-                                try:
-                                    vehicle_service.save(vehicle.vehicle_id, db, "year", int(parts[0]))
-                                    vehicle_service.save(vehicle.vehicle_id, db, "make", parts[1])
-                                    body_type = " ".join(parts[2:]).strip()
-                                    if body_type:
-                                        vehicle_service.save(vehicle.vehicle_id, db, "body_type", body_type)
-                                except Exception:
-                                    pass
-                        session_service.save(session_id, db, "vehicle_step", VehicleStep.use)
-                        return add_bot_message(session_id, db)
-    except Exception:
-        pass
-    
-    try:
-        message = message_service.add_message(session_id, Sender.bot, content, db)
-        return message
-    except Exception:
+                flight.result = value
+                if with_user:
+                    yield sse("user", loaded.user_message.model_dump(mode="json"))
+                yield sse("message", flight.result.model_dump(mode="json"))
+    except Exception as e:
+        print(e)
+        yield sse("error", {"detail": "Failed to save bot response."})
+
+@router.post("/{session_id}/turn", response_model=TurnResponse)
+async def take_turn(
+    session_id: int,
+    content: str = Body(..., embed=True),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    The user's message and the bot's reply in one request. Both are stored by the turn's single commit,
+    under the session's turn lock, so no other message can land between them and a failed turn stores
+    neither. A retry with the same Idempotency-Key returns the stored pair.
+    """
+    loaded = _TurnLoader(session_id, None, db, content=content, idempotency_key=idempotency_key)
+    async with turn_lock.single_flight(session_id, loaded.completed, share=False) as flight:
+        if flight.leader and loaded.begin():
+            flight.result = await _run_bot_turn(session_id, db, loaded.turn)
+    error = loaded.error()
+    if error:
+        raise error
+    return TurnResponse(user_message=loaded.user_message, bot_message=flight.result)
+
+@router.post("/{session_id}/turn/stream")
+async def stream_turn(
+    session_id: int,
+    content: str = Body(..., embed=True),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+):
+    """
+    /turn over server-sent events, like /bot/stream: "token" and "reset" while the reply is generated,
+    then the stored user message as a "user" event and the reply as a "message" event.
+    """
+    return StreamingResponse(
+        _take_turn_events(session_id, content, idempotency_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _take_turn_events(session_id: int, content: str, idempotency_key: Optional[str]):
+    async with AsyncSessionLocal() as db:
+        loaded = _TurnLoader(session_id, None, db, content=content, idempotency_key=idempotency_key)
+        async with turn_lock.single_flight(session_id, loaded.completed, share=False) as flight:
+            if flight.leader and loaded.begin():
+                async for event in _turn_events(session_id, db, loaded, flight, with_user=True):
+                    yield event
+                return
+        error = loaded.error()
+        if error:
+            yield sse("error", {"detail": error.detail})
+            return
+        yield sse("user", loaded.user_message.model_dump(mode="json"))
+        yield sse("message", flight.result.model_dump(mode="json"))
+
+def _turn_start(session_id: int, idempotency_key: Optional[str], db: Session) -> int:
+    # the turn answers the user message with this key, or else whatever the session holds right now
+    if idempotency_key:
+        keyed = message_service.get_message_by_idempotency_key(session_id, idempotency_key, db)
+        if keyed:
+            return keyed.message_id
+    last = db.query(Message.message_id).filter(Message.session_id == session_id).order_by(Message.message_id.desc()).first()
+    return last[0] if last else 0
+
+class _TurnLoader:
+    """
+    single_flight's completed() check, answered from the turn context: once the turn holds the lock, the
+    context it runs on is loaded and any bot message newer than the turn's start is found in the same queries.
+    With content (POST /turn) the turn also stores the user message, unless its Idempotency-Key already did;
+    then the turn's start is that message.
+    """
+
+    def __init__(self, session_id: int, since: Optional[int], db: AsyncSession, content: Optional[str] = None, idempotency_key: Optional[str] = None):
+        self.session_id = session_id
+        self.since = since
+        self.db = db
+        self.content = content
+        self.idempotency_key = idempotency_key
+        self.turn: Optional[TurnContext] = None
+        self.stored: Optional[MessageResponse] = None
+
+    def _load(self, db: Session) -> Optional[TurnContext]:
+        turn = turn_context.load(self.session_id, db)
+        if turn is not None and self.content is not None and self.idempotency_key:
+            keyed = message_service.get_message_by_idempotency_key(self.session_id, self.idempotency_key, db)
+            if keyed:
+                self.stored = MessageResponse.model_validate(keyed)
+                self.since = keyed.message_id
+        return turn
+
+    async def completed(self) -> Optional[MessageResponse]:
+        self.turn = await run_read(self.db, self._load)
+        if self.turn is None or self.since is None:
+            return None
+        return self.turn.bot_message_since(self.since)
+
+    def error(self) -> Optional[HTTPException]:
+        if self.turn is None:
+            return HTTPException(status_code=404, detail="Session not found.")
+        if self.stored and (self.stored.sender != Sender.user or self.stored.content != self.content):
+            return HTTPException(status_code=409, detail="Idempotency-Key was already used for a different message.")
         return None
 
+    def begin(self) -> bool:
+        # False when the turn cannot run; error() says why
+        if self.error():
+            return False
+        if self.stored is None:
+            self.turn.add_user_message(self.content, self.idempotency_key)
+        return True
+
+    @property
+    def user_message(self) -> Optional[MessageResponse]:
+        return self.stored or self.turn.user_message
+
+def _import_fleet(session_id: int, vins: List[str], db: Session) -> FleetImportResponse:
+    if not fleet_service.session_exists(session_id, db):
+        raise HTTPException(status_code=404, detail="Session not found.")
+    vins = [vin for vin in vins if vin and vin.strip()]
+    if not vins:
+        raise HTTPException(status_code=400, detail="No VINs provided.")
+    if len(vins) > fleet_service.MAX_FLEET_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {fleet_service.MAX_FLEET_SIZE} VINs can be imported at once.")
+    return fleet_service.import_vins(session_id, vins, db)
+
+@router.post("/{session_id}/vehicles/import", response_model=FleetImportResponse)
+def import_fleet(
+    session_id: int,
+    fleet: FleetImportRequest,
+    db: Session = Depends(get_db),
+):
+    return _import_fleet(session_id, fleet.vins, db)
+
+@router.post("/{session_id}/vehicles/import/csv", response_model=FleetImportResponse)
+def import_fleet_csv(
+    session_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+):
+    return _import_fleet(session_id, fleet_service.parse_vin_csv(file.file.read()), db)
+
 @router.get("/get-all-messages/{session_id}", response_model=List[MessageResponse])
 def get_messages(session_id, db: Session = Depends(get_db)):
     messages = message_service.get_messages(session_id, db)
@@ -0,0 +1,62 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services import context, http_client, llm_usage, turn_lock, vin_cache
+
+router = APIRouter(
+    tags=["Metrics"]
+)
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # prometheus text exposition format
+    lines = []
+
+    http_stats = http_client.stats()
+    lines.append("# TYPE outbound_http_requests_total counter")
+    for (host, outcome), count in sorted(http_stats["requests"].items()):
+        lines.append(f'outbound_http_requests_total{{host="{host}",outcome="{outcome}"}} {count}')
+    lines.append("# TYPE outbound_http_circuit_state gauge")
+    for host, state in sorted(http_stats["breakers"].items()):
+        lines.append(f'outbound_http_circuit_state{{host="{host}"}} {BREAKER_STATES[state]}')
+
+    cache_stats = vin_cache.stats()
+    lines.append("# TYPE vin_cache_events_total counter")
+    for event in ("hits", "misses", "evictions", "db_hits", "db_misses"):
+        lines.append(f'vin_cache_events_total{{event="{event}"}} {cache_stats[event]}')
+    lines.append("# TYPE vin_cache_size gauge")
+    lines.append(f"vin_cache_size {cache_stats['size']}")
+
+    usage_stats = llm_usage.stats()
+    lines.append("# TYPE llm_completions_total counter")
+    for version, count in sorted(usage_stats["completions"].items()):
+        lines.append(f'llm_completions_total{{prompt_version="{version}"}} {count}')
+    # cache hit rate = cached / prompt
+    lines.append("# TYPE llm_tokens_total counter")
+    for (version, kind), count in sorted(usage_stats["tokens"].items()):
+        lines.append(f'llm_tokens_total{{prompt_version="{version}",kind="{kind}"}} {count}')
+
+    # estimated size of the prompts we send, to tune PROMPT_TOKEN_BUDGET
+    context_stats = context.stats()
+    lines.append("# TYPE llm_context_turns_total counter")
+    lines.append(f"llm_context_turns_total {context_stats['turns']}")
+    lines.append("# TYPE llm_context_prompt_tokens_total counter")
+    lines.append(f"llm_context_prompt_tokens_total {context_stats['prompt_tokens']}")
+    lines.append("# TYPE llm_context_prompt_tokens_max gauge")
+    lines.append(f"llm_context_prompt_tokens_max {context_stats['max_prompt_tokens']}")
+    lines.append("# TYPE llm_context_dropped_messages_total counter")
+    lines.append(f"llm_context_dropped_messages_total {context_stats['dropped_messages']}")
+    lines.append("# TYPE llm_context_summarized_turns_total counter")
+    lines.append(f"llm_context_summarized_turns_total {context_stats['summarized_turns']}")
+
+    # concurrent requests for the same session's bot turn that shared another request's reply
+    turn_stats = turn_lock.stats()
+    lines.append("# TYPE bot_turns_total counter")
+    lines.append(f"bot_turns_total {turn_stats['turns']}")
+    lines.append("# TYPE bot_turns_coalesced_total counter")
+    lines.append(f'bot_turns_coalesced_total{{scope="process"}} {turn_stats["coalesced_process"]}')
+    lines.append(f'bot_turns_coalesced_total{{scope="database"}} {turn_stats["coalesced_database"]}')
+
+    return "\n".join(lines) + "\n"
@@ -1,26 +1,34 @@
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Body, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.db.database import get_db
 from app.schemas.message import MessageCreate, MessageResponse
+from app.schemas.session import SessionResponse, SessionUpdate
 from app.services.session import create_session
 from app.enums.sender import Sender
 from app.services import messaging as message_service
 from app.services import session as session_service
-from app.enums.license_status import LicenseStatus
-from app.enums.license_type import LicenseType
 
 router = APIRouter(
     prefix="/session",
     tags=["Session"]
 )
 
-@router.post("/save", response_model=None)
-def save(
+@router.post("/{session_id}/update", response_model=SessionResponse)
+def update(
     session_id: int,
-    attribute: str,
-    value: str | LicenseType | LicenseStatus,
+    changes: SessionUpdate,
     db: Session = Depends(get_db),
 ):
-    session_service.save(session_id=session_id, db=db, attribute=attribute, value=value)
\ No newline at end of file
+    # only the fields sent are written, in one statement and one commit
+    fields = changes.model_dump(exclude_unset=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="No changes provided.")
+    session, _ = session_service.update(session_id, db, fields, commit=False)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    # from the RETURNING row, before the commit expires it
+    response = SessionResponse.model_validate(session)
+    db.commit()
+    return response
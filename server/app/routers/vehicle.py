@@ -13,9 +13,9 @@ router = APIRouter(
 
 @router.post("/save", response_model=None)
 def save(
-    session_id: int,
+    vehicle_id: int,
     attribute: str,
     value: str | LicenseType | LicenseStatus,
     db: Session = Depends(get_db),
 ):
-    vehicle_service.save(session_id=session_id, db=db, attribute=attribute, value=value)
\ No newline at end of file
+    vehicle_service.save(vehicle_id=vehicle_id, db=db, attribute=attribute, value=value)
\ No newline at end of file
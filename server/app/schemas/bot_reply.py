@@ -0,0 +1,70 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
+
+from app.enums.chat_step import ChatStep
+from app.enums.license_status import LicenseStatus
+from app.enums.license_type import LicenseType
+from app.enums.vehicle_step import VehicleStep
+from app.enums.vehicle_use import VehicleUse
+
+SCHEMA_NAME_PREFIX = "bot_reply_"
+
+# values the model may always return, whatever the step
+COMMON_EXTRACTED = ["none", "connect_to_agent"]
+
+# steps whose answer is one of a fixed set; everything else is free text
+YES_NO_EXTRACTED = ["true", "false"]
+STEP_EXTRACTED_OPTIONS = {
+    ChatStep.license_type: [t.value for t in LicenseType],
+    ChatStep.license_status: [s.value for s in LicenseStatus],
+}
+
+class BotReply(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    content: str
+    valid: bool
+    extracted: str
+
+def extracted_options(current_step, vehicle_step) -> Optional[List[str]]:
+    if current_step == ChatStep.vehicles:
+        if vehicle_step is None:
+            return YES_NO_EXTRACTED + COMMON_EXTRACTED
+        if vehicle_step == VehicleStep.use:
+            return [u.value for u in VehicleUse] + COMMON_EXTRACTED
+        return None
+    options = STEP_EXTRACTED_OPTIONS.get(current_step)
+    return options + COMMON_EXTRACTED if options else None
+
+def step_name(current_step, vehicle_step) -> str:
+    if current_step == ChatStep.vehicles:
+        return vehicle_step.value if vehicle_step else "add_vehicle"
+    return current_step.value
+
+def response_format(current_step, vehicle_step) -> Dict:
+    """
+    Strict json_schema response format for the step, so every completion parses into BotReply.
+    The schema name carries the step (bot_reply_<step>), which is what the offline stub provider answers from.
+    """
+    extracted = {"type": "string"}
+    options = extracted_options(current_step, vehicle_step)
+    if options:
+        extracted["enum"] = options
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": f"{SCHEMA_NAME_PREFIX}{step_name(current_step, vehicle_step)}",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "content": {"type": "string"},
+                    "valid": {"type": "boolean"},
+                    "extracted": extracted
+                },
+                "required": ["content", "valid", "extracted"],
+                "additionalProperties": False
+            }
+        }
+    }
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class FleetImportRequest(BaseModel):
+    vins: List[str]
+
+class FleetImportRow(BaseModel):
+    row: int
+    vin: str
+    valid: bool
+    error: Optional[str] = None
+
+    vehicle_id: Optional[int] = None
+    year: Optional[int] = None
+    make: Optional[str] = None
+    body_type: Optional[str] = None
+
+class FleetImportResponse(BaseModel):
+    session_id: int
+    imported: int
+    rejected: int
+    rows: List[FleetImportRow]
@@ -14,3 +14,7 @@ class MessageResponse(MessageBase):
 
     class Config:
         from_attributes = True
+
+class TurnResponse(BaseModel):
+    user_message: MessageResponse
+    bot_message: MessageResponse
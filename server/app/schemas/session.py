@@ -1,10 +1,11 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, field_validator
 
 from app.enums.chat_step import ChatStep
 from app.enums.vehicle_step import VehicleStep
 from app.enums.license_status import LicenseStatus
 from app.enums.license_type import LicenseType
+from app.enums.vehicle_use import VehicleUse
 
 class SessionBase(BaseModel):
     current_step: ChatStep
@@ -31,8 +32,33 @@ class SessionUpdate(BaseModel):
     license_type: Optional[LicenseType] = None
     license_status: Optional[LicenseStatus] = None
 
+    # optional so it can be left out, but the column can't be cleared
+    @field_validator("current_step")
+    @classmethod
+    def current_step_not_null(cls, value):
+        if value is None:
+            raise ValueError("current_step cannot be null.")
+        return value
+
 class SessionResponse(SessionBase):
     session_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class VehicleSummary(BaseModel):
+    vehicle_id: int
+    vin: Optional[str] = None
+    year: Optional[int] = None
+    make: Optional[str] = None
+    body_type: Optional[str] = None
+    vehicle_use: Optional[VehicleUse] = None
+    blind_spot_warning_equipped: Optional[bool] = None
+    days_per_week: Optional[int] = None
+    one_way_miles: Optional[int] = None
+    annual_mileage: Optional[int] = None
+
+class SessionSummary(SessionBase):
+    session_id: int
+    vehicles: List[VehicleSummary] = []
+    complete: bool = False
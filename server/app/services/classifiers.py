@@ -0,0 +1,219 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.enums.license_status import LicenseStatus
+from app.enums.license_type import LicenseType
+from app.enums.vehicle_use import VehicleUse
+
+# answer classifiers shared by every conversation step. patterns compile once at import and option
+# keywords are found in a single pass over the answer, so a classification costs microseconds.
+# each result says how sure it is; callers decide how much confidence they need.
+
+EXACT = 1.0       # the whole answer is the value
+LEADING = 0.9     # the answer starts with it ("commuting, mostly")
+PATTERN = 0.8     # found by a pattern inside a longer answer
+MENTIONED = 0.6   # the only option mentioned somewhere in the answer
+
+YES_WORDS = frozenset(["yes", "y", "yeah", "yea", "sure", "ok", "okay", "yep"])
+NO_WORDS = frozenset(["no", "n", "nah", "nope"])
+BODY_TYPES = frozenset(["sedan", "suv", "truck", "coupe", "hatchback", "wagon", "van", "convertible", "pickup", "minivan", "sport"])
+
+ZIP_PATTERN = re.compile(r"^(\d{5})(?:-\d{4})?$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[A-Za-z]{2,}$")
+NUMBER_PATTERN = re.compile(r"^\d{1,3}(?:,\d{3})+$|^\d+$")
+# year, make (one or two words), body type
+YEAR_MAKE_BODY_PATTERN = re.compile(r"\b(19\d{2}|20[0-2]\d)\s+([A-Za-z]+(?:\s+[A-Za-z]+)?)\s+([A-Za-z]+)", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+# "not suspended", "never commercial": a negated option is not an answer
+NEGATION_PATTERN = re.compile(r"\b(?:not|never|isn't|isnt|no longer)\s+$")
+TRAILING_PUNCTUATION = "?.,!"
+
+
+@dataclass(frozen=True)
+class Classification:
+    value: Any            # None when nothing was recognised
+    confidence: float = 0.0
+
+    @property
+    def matched(self) -> bool:
+        return self.value is not None
+
+
+NO_MATCH = Classification(None)
+
+
+@dataclass(frozen=True)
+class Hit:
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed set of lowercase keywords: every occurrence of every keyword in one pass."""
+
+    def __init__(self, keywords: Sequence[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(keyword)
+
+        # failure links, breadth first, so each state also reports the keywords ending at its suffixes
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str, whole_words: bool = True) -> List[Hit]:
+        """Hits in order of where they end. whole_words drops hits inside a longer word ("valid" in "invalid")."""
+        hits = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword in self._out[state]:
+                start = index - len(keyword) + 1
+                if whole_words and not _at_word_boundary(text, start, index + 1):
+                    continue
+                hits.append(Hit(keyword, start, index + 1))
+        return hits
+
+
+def _at_word_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def _normalize(text: str) -> str:
+    return text.lower().strip()
+
+
+class OptionClassifier:
+    """Which one of a fixed set of options an answer picks: the whole answer, its start, or its only mention."""
+
+    def __init__(self, options: Sequence[str]):
+        self.options = list(options)
+        self._matcher = KeywordMatcher(self.options)
+
+    def __call__(self, text: str) -> Classification:
+        lower = _normalize(text)
+        clean = lower.rstrip(TRAILING_PUNCTUATION).strip()
+        if clean in self.options:
+            return Classification(clean, EXACT)
+
+        hits = self._matcher.find_all(lower)
+        if any(NEGATION_PATTERN.search(lower[:hit.start]) for hit in hits):
+            return NO_MATCH
+        leading = [hit.keyword for hit in hits if hit.start == 0]
+        if leading:
+            # options order breaks ties, as when one option is a prefix of another
+            return Classification(min(leading, key=self.options.index), LEADING)
+        mentioned = {hit.keyword for hit in hits}
+        if len(mentioned) == 1:
+            return Classification(mentioned.pop(), MENTIONED)
+        return NO_MATCH
+
+
+vehicle_use = OptionClassifier([use.value for use in VehicleUse])
+license_type = OptionClassifier([license.value for license in LicenseType])
+license_status = OptionClassifier([status.value for status in LicenseStatus])
+
+
+def yes_no(text: str) -> Classification:
+    """The first word decides; any word of the other answer makes it ambiguous ("yes, no, wait")."""
+    words = WORD_PATTERN.findall(_normalize(text))
+    if not words:
+        return NO_MATCH
+    if words[0] in YES_WORDS:
+        value, others = True, NO_WORDS
+    elif words[0] in NO_WORDS:
+        value, others = False, YES_WORDS
+    else:
+        return NO_MATCH
+    if any(word in others for word in words[1:]):
+        return NO_MATCH
+    return Classification(value, EXACT if len(words) == 1 else LEADING)
+
+
+def reply_yes_no(text: str) -> Classification:
+    # the model writes booleans as "true"/"false"
+    lower = _normalize(text)
+    if lower in ("true", "false"):
+        return Classification(lower == "true", EXACT)
+    return yes_no(text)
+
+
+def vehicle_identity(text: str) -> Classification:
+    """A VIN, or year, make and body type, as a dict of vehicle attributes."""
+    text = text.strip()
+    compact = text.replace("-", "").replace(" ", "")
+    if len(compact) == 17 and compact.isalnum():
+        return Classification({"vin": compact.upper()}, EXACT)
+
+    matches = list(YEAR_MAKE_BODY_PATTERN.finditer(text))
+    for match in matches:
+        year, make, body_type = match.group(1), match.group(2).strip(), match.group(3).strip()
+        if body_type.lower() in BODY_TYPES:
+            return Classification({"year": int(year), "make": make, "body_type": body_type}, EXACT if match.group(0) == text else PATTERN)
+        if len(text.split()) >= 3 and len(body_type) > 2:
+            return Classification({"year": int(year), "make": make, "body_type": body_type}, MENTIONED)
+    if matches:
+        return NO_MATCH
+
+    parts = text.split()
+    if len(parts) >= 3 and parts[0].isdigit() and 1900 <= int(parts[0]) <= 2029:
+        return Classification({"year": int(parts[0]), "make": parts[1], "body_type": " ".join(parts[2:])}, MENTIONED)
+    return NO_MATCH
+
+
+def number(text: str, maximum: Optional[int] = None) -> Classification:
+    """A positive whole number, commas allowed ("12,000"), at most maximum."""
+    clean = _normalize(text).rstrip(TRAILING_PUNCTUATION).strip()
+    if not NUMBER_PATTERN.match(clean):
+        return NO_MATCH
+    value = int(clean.replace(",", ""))
+    if value <= 0 or (maximum is not None and value > maximum):
+        return NO_MATCH
+    return Classification(value, EXACT)
+
+
+def pattern(text: str, compiled: re.Pattern) -> Classification:
+    # the first group if the pattern has one, else the whole match
+    match = compiled.match(text.strip())
+    if not match:
+        return NO_MATCH
+    return Classification(match.group(1) if match.groups() else match.group(0), EXACT)
+
+
+def zip_code(text: str) -> Classification:
+    return pattern(text, ZIP_PATTERN)
+
+
+def email(text: str) -> Classification:
+    return pattern(text, EMAIL_PATTERN)
+
+
+def free_text(text: str) -> Classification:
+    # the model's extracted value taken as is; "none" means it found nothing
+    text = text.strip()
+    if not text or text.lower() == "none":
+        return NO_MATCH
+    return Classification(text, EXACT)
@@ -0,0 +1,133 @@
+import threading
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from app.config import CONTEXT_MIN_MESSAGES, PROMPT_TOKEN_BUDGET
+from app.enums.sender import Sender
+from app.models.message import Message
+from app.services.turn_context import TurnContext
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # optional dependency (or no cached encoding offline): ~4 characters per token is close enough for budgeting
+    _encoding = None
+
+# chat format adds a few tokens per message for the role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_lock = threading.Lock()
+_stats = {"turns": 0, "prompt_tokens": 0, "max_prompt_tokens": 0, "dropped_messages": 0, "summarized_turns": 0}
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _message_tokens(message: Dict[str, Any]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def state_summary(turn: TurnContext) -> str:
+    """Compact, authoritative view of what has been collected, in place of the turns that were dropped."""
+    session = turn.session
+    lines = ["STATE SUMMARY (from the database, authoritative). Earlier messages were omitted; this is what has been collected so far:"]
+    for label, value in (
+        ("zip_code", session.zip_code),
+        ("full_name", session.full_name),
+        ("email", session.email),
+        ("license_type", session.license_type.value if session.license_type else None),
+        ("license_status", session.license_status.value if session.license_status else None),
+    ):
+        if value:
+            lines.append(f"- {label}: {value}")
+
+    if turn.vehicles:
+        lines.append("- vehicles:")
+    for idx, vehicle in enumerate(turn.vehicles, 1):
+        parts = []
+        if vehicle.vin:
+            parts.append(f"VIN {vehicle.vin}")
+        identity = " ".join(str(v) for v in (vehicle.year, vehicle.make, vehicle.body_type) if v)
+        if identity:
+            parts.append(identity)
+        if vehicle.vehicle_use:
+            parts.append(f"use {vehicle.vehicle_use.value}")
+        if vehicle.blind_spot_warning_equipped is not None:
+            parts.append(f"blind spot warning {'yes' if vehicle.blind_spot_warning_equipped else 'no'}")
+        if vehicle.days_per_week:
+            parts.append(f"{vehicle.days_per_week} commuting days/week")
+        if vehicle.one_way_miles:
+            parts.append(f"{vehicle.one_way_miles} one-way miles")
+        if vehicle.annual_mileage:
+            parts.append(f"{vehicle.annual_mileage} annual miles")
+        lines.append(f"  {idx}. " + (", ".join(parts) if parts else "details not collected yet"))
+
+    step = session.current_step.value
+    if session.vehicle_step:
+        step += f" / {session.vehicle_step.value}"
+    lines.append(f"- current step: {step}")
+    return "\n".join(lines)
+
+
+def _history(messages: Sequence[Message]) -> List[Dict[str, Any]]:
+    return [
+        {"role": "assistant" if m.sender == Sender.bot else "user", "content": m.content}
+        for m in messages
+    ]
+
+
+def build_messages(
+    prefix: str,
+    step_block: str,
+    messages: Sequence[Message],
+    summarize: Callable[[], str],
+    budget: int = PROMPT_TOKEN_BUDGET
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Lays out [prefix, (state summary), recent history, step block] within the token budget.
+    messages are oldest first. The newest CONTEXT_MIN_MESSAGES are always kept; older ones are
+    dropped, oldest first, until the rest fits, and a summary from the db stands in for them.
+    summarize is only called when something is dropped.
+    """
+    prefix_message = {"role": "system", "content": prefix}
+    step_message = {"role": "system", "content": step_block}
+    history = _history(messages)
+    costs = [_message_tokens(m) for m in history]
+    fixed = _message_tokens(prefix_message) + _message_tokens(step_message)
+
+    summary_message = None
+    kept = len(history)
+    if fixed + sum(costs) > budget:
+        summary_message = {"role": "system", "content": summarize()}
+        available = budget - fixed - _message_tokens(summary_message)
+        kept = 0
+        for cost in reversed(costs):
+            if kept >= CONTEXT_MIN_MESSAGES and cost > available:
+                break
+            available -= cost
+            kept += 1
+
+    recent = history[len(history) - kept:]
+    messages_list = [prefix_message] + ([summary_message] if summary_message else []) + recent + [step_message]
+
+    report = {
+        "prompt_tokens": sum(_message_tokens(m) for m in messages_list),
+        "history_messages": kept,
+        "dropped_messages": len(history) - kept,
+        "summary_tokens": _message_tokens(summary_message) if summary_message else 0,
+    }
+    with _lock:
+        _stats["turns"] += 1
+        _stats["prompt_tokens"] += report["prompt_tokens"]
+        _stats["max_prompt_tokens"] = max(_stats["max_prompt_tokens"], report["prompt_tokens"])
+        _stats["dropped_messages"] += report["dropped_messages"]
+        _stats["summarized_turns"] += 1 if summary_message else 0
+    return messages_list, report
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
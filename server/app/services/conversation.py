@@ -0,0 +1,239 @@
+import json
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import FAST_PATH_ENABLED
+from app.db.database import run_read
+from app.enums.chat_step import ChatStep
+from app.enums.license_status import LicenseStatus
+from app.enums.license_type import LicenseType
+from app.enums.sender import Sender
+from app.enums.vehicle_step import VehicleStep
+from app.enums.vehicle_use import VehicleUse
+from app.models.message import Message
+from app.models.session import Session as SessionModel
+from app.models.vehicle import Vehicle
+from app.schemas.bot_reply import BotReply
+from app.schemas.message import MessageResponse
+from app.services import classifiers, fast_path, intro_pool, turn_context
+from app.services import session as session_service
+from app.services import messaging as message_service
+from app.services.classifiers import Classification
+from app.services.turn_context import TurnContext
+from app.services.vin_validator import avalidate_vehicle_info, avalidate_vin
+
+# the conversation as a table of states. a turn is one pass: load the session once, extract the
+# answer to the current state, persist it and move to the next state in memory, generate at most
+# one reply, commit once. answers the classifiers recognise never need the LLM to extract them;
+# anything else is left to the model, which extracts and replies in the same completion.
+
+BOT_ERROR_REPLY = BotReply(
+    content="I encountered an error with your request. Please try again momentarily.",
+    valid=False,
+    extracted="none"
+)
+
+# below this the deterministic answer is not trusted and the model gets the message instead
+MIN_CONFIDENCE = 0.5
+
+
+# persistence: value -> session/vehicle attributes, in memory until the turn commits them in one batch
+
+def _set_session(attribute: str, convert: Callable[[Any], Any] = lambda value: value):
+    def persist(turn: TurnContext, value: Any):
+        turn.set_session(attribute, convert(value))
+    return persist
+
+
+def _set_vehicle(attribute: str, convert: Callable[[Any], Any] = lambda value: value):
+    def persist(turn: TurnContext, value: Any):
+        turn.set_vehicle(turn.vehicle(), attribute, convert(value))
+    return persist
+
+
+def _set_vehicle_identity(turn: TurnContext, value: Dict[str, Any]):
+    # fills in a vehicle the chat started without an identity yet; any other vehicle, finished or
+    # brought in by a fleet import with its decoded vin, year and make, is left alone for a new one
+    vehicle = turn.vehicles[-1] if turn.vehicles else None
+    if vehicle is None or vehicle.vin is not None or vehicle.year is not None:
+        vehicle = turn.new_vehicle()
+    for attribute, attribute_value in value.items():
+        turn.set_vehicle(vehicle, attribute, attribute_value)
+
+
+def _nothing(turn: TurnContext, value: Any):
+    pass
+
+
+def _to(current_step: ChatStep, vehicle_step: Optional[VehicleStep] = None):
+    return lambda turn, value: (current_step, vehicle_step)
+
+
+def _after_add_vehicle(turn: TurnContext, value: bool):
+    return (ChatStep.vehicles, VehicleStep.vin_or_year_make_body) if value else (ChatStep.license_type, None)
+
+
+def _after_blind_spot(turn: TurnContext, value: bool):
+    if turn.vehicle().vehicle_use == VehicleUse.commuting:
+        return ChatStep.vehicles, VehicleStep.commuting_days
+    return ChatStep.vehicles, VehicleStep.annual_mileage
+
+
+@dataclass(frozen=True)
+class State:
+    extract: Optional[Callable[[str], Classification]]   # from the user's message, without the LLM
+    parse_reply: Callable[[str], Classification]         # from the model's "extracted"
+    persist: Callable[[TurnContext, Any], None]
+    next: Callable[[TurnContext, Any], Tuple[ChatStep, Optional[VehicleStep]]]
+    reply_asks_next: bool = False             # this state's prompt already has the model ask the next question
+    validate: bool = False                    # extracted vehicles are checked against NHTSA before they are accepted
+
+
+_commuting_days = partial(classifiers.number, maximum=7)
+
+STATES: Dict[str, State] = {
+    "zip_code": State(classifiers.zip_code, classifiers.free_text, _set_session("zip_code"), _to(ChatStep.full_name), reply_asks_next=True),
+    "full_name": State(None, classifiers.free_text, _set_session("full_name"), _to(ChatStep.email), reply_asks_next=True),
+    "email": State(classifiers.email, classifiers.free_text, _set_session("email"), _to(ChatStep.vehicles), reply_asks_next=True),
+    "add_vehicle": State(classifiers.yes_no, classifiers.reply_yes_no, _nothing, _after_add_vehicle, reply_asks_next=True),
+    "vin_or_year_make_body": State(classifiers.vehicle_identity, classifiers.vehicle_identity, _set_vehicle_identity, _to(ChatStep.vehicles, VehicleStep.use), validate=True),
+    "use": State(classifiers.vehicle_use, classifiers.vehicle_use, _set_vehicle("vehicle_use", VehicleUse), _to(ChatStep.vehicles, VehicleStep.blind_spot)),
+    "blind_spot": State(classifiers.yes_no, classifiers.reply_yes_no, _set_vehicle("blind_spot_warning_equipped"), _after_blind_spot),
+    "commuting_days": State(_commuting_days, _commuting_days, _set_vehicle("days_per_week"), _to(ChatStep.vehicles, VehicleStep.commuting_miles)),
+    "commuting_miles": State(classifiers.number, classifiers.number, _set_vehicle("one_way_miles"), _to(ChatStep.vehicles)),
+    "annual_mileage": State(classifiers.number, classifiers.number, _set_vehicle("annual_mileage"), _to(ChatStep.vehicles)),
+    "license_type": State(classifiers.license_type, classifiers.license_type, _set_session("license_type", LicenseType), _to(ChatStep.license_status), reply_asks_next=True),
+    "license_status": State(classifiers.license_status, classifiers.license_status, _set_session("license_status", LicenseStatus), _to(ChatStep.license_status)),
+    # everything is collected; every message gets the completion message again
+    "complete": State(None, lambda text: classifiers.NO_MATCH, _nothing, _to(ChatStep.license_status)),
+}
+
+
+def state_key(session: SessionModel) -> str:
+    if session.current_step == ChatStep.vehicles:
+        return session.vehicle_step.value if session.vehicle_step else "add_vehicle"
+    if session.current_step == ChatStep.license_status and session.license_status:
+        return "complete"
+    return session.current_step.value
+
+
+async def _validated(value: Dict[str, Any]) -> bool:
+    if "vin" in value:
+        result = await avalidate_vin(value["vin"])
+    else:
+        result = await avalidate_vehicle_info(value["year"], value["make"], value["body_type"])
+    return bool(result.get("valid"))
+
+
+def _value(classify: Optional[Callable[[str], Classification]], text: Optional[str]) -> Any:
+    if classify is None or text is None:
+        return None
+    result = classify(text)
+    return result.value if result.confidence >= MIN_CONFIDENCE else None
+
+
+def advance(turn: TurnContext, state: State, value: Any):
+    state.persist(turn, value)
+    current_step, vehicle_step = state.next(turn, value)
+    turn.set_session("current_step", current_step)
+    turn.set_session("vehicle_step", vehicle_step)
+
+
+def finish(turn: TurnContext, reply: BotReply, db: Session) -> MessageResponse:
+    """Stores the transition, the new vehicle, the summary, the user message, the reply and the token usage in one commit."""
+    message = Message(session_id=turn.session_id, sender=Sender.bot, content=reply.model_dump_json())
+    db.add_all(turn.added + [message])
+    db.flush()
+    new_vehicles = [row for row in turn.added if isinstance(row, Vehicle)]
+    session_service.update(
+        turn.session_id, db, turn.session_changes, turn.vehicle_changes, new_vehicles, commit=False
+    )
+    response = MessageResponse.model_validate(message)
+    turn.user_message = next((MessageResponse.model_validate(row) for row in turn.added if isinstance(row, Message)), None)
+    db.commit()
+    return response
+
+
+def _extracted_text(value: Any) -> str:
+    if value is None:
+        return "none"
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+async def _generate(session_id: int, db: AsyncSession, prompt, stream: bool) -> AsyncIterator[Tuple[str, Any]]:
+    if stream:
+        async for event in message_service.astream_bot_response(session_id, db, prompt=prompt):
+            yield event
+    else:
+        yield "reply", await message_service.aget_bot_response(session_id, db, prompt=prompt)
+
+
+async def arun_turn(session_id: int, db: AsyncSession, stream: bool = False, turn: Optional[TurnContext] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Runs one bot turn, on turn when the caller already loaded it. With stream, yields ("token", text) and
+    ("reset", None) while the reply is generated; always ends with ("message", MessageResponse).
+    Raises LookupError for an unknown session.
+    """
+    if turn is None:
+        turn = await run_read(db, lambda sync_db: turn_context.load(session_id, sync_db))
+    if turn is None:
+        raise LookupError(f"Session {session_id} not found.")
+
+    # greetings come from the intro pool
+    if not turn.messages:
+        reply = intro_pool.get_intro()
+        yield "message", await db.run_sync(lambda sync_db: finish(turn, reply, sync_db))
+        return
+
+    state = STATES[state_key(turn.session)]
+    text = turn.user_text
+    value = _value(state.extract, text)
+    if value is not None and state.validate and not await _validated(value):
+        # let the model explain what is wrong with it, through the validation tools
+        value = None
+
+    if value is not None or text is None:
+        # the answer is known (or there is none): ask the next question, from a template or the model
+        if value is not None:
+            advance(turn, state, value)
+        question = fast_path.render_question(turn.session, len(turn.vehicles))
+        reply = BotReply(content=question, valid=value is not None, extracted=_extracted_text(value))
+        if not (FAST_PATH_ENABLED and value is not None):
+            prompt = message_service.build_turn_prompt(turn, ask_only=True)
+            try:
+                async for kind, event in _generate(session_id, db, prompt, stream):
+                    if kind == "reply":
+                        # the model only words the question: valid and extracted stay those of the value
+                        # extracted above, and a failed generation keeps the template question
+                        if event is not message_service.ERROR_REPLY:
+                            reply = reply.model_copy(update={"content": event.content})
+                    else:
+                        yield kind, event
+            except Exception as e:
+                print(e)
+    else:
+        # the model extracts and replies in one completion
+        prompt = message_service.build_turn_prompt(turn)
+        reply = BOT_ERROR_REPLY
+        try:
+            async for kind, event in _generate(session_id, db, prompt, stream):
+                if kind == "reply":
+                    reply = event
+                else:
+                    yield kind, event
+        except Exception as e:
+            print(e)
+
+        value = _value(state.parse_reply, reply.extracted) if reply.valid and reply.extracted != "connect_to_agent" else None
+        if value is not None:
+            advance(turn, state, value)
+            if not state.reply_asks_next:
+                if stream:
+                    yield "reset", None
+                reply = BotReply(content=fast_path.render_question(turn.session, len(turn.vehicles)), valid=True, extracted=reply.extracted)
+
+    yield "message", await db.run_sync(lambda sync_db: finish(turn, reply, sync_db))
@@ -0,0 +1,56 @@
+from app.enums.chat_step import ChatStep
+from app.enums.vehicle_step import VehicleStep
+from app.models.session import Session as SessionModel
+
+# template questions for each state. with FAST_PATH_ENABLED, a turn whose answer was extracted
+# without the LLM asks the next question from here instead of generating it
+
+QUESTIONS = {
+    ChatStep.zip_code: "Could you please share your 5-digit zip code?",
+    ChatStep.full_name: "Thanks! Could you please share your full name?",
+    ChatStep.email: "Thank you! Could you please provide your email address?",
+    ChatStep.license_type: "Got it. Please choose your license type: personal, commercial, or foreign.",
+    ChatStep.license_status: "Thanks! Please choose your license status: valid or suspended.",
+    VehicleStep.vin_or_year_make_body: "Great! Please provide either a VIN (17 characters) or Year, Make, and Body Type (e.g., 2020 Toyota Sedan).",
+    VehicleStep.use: "Thanks! Please choose the vehicle use: commuting, commercial, farming, or business.",
+    VehicleStep.blind_spot: "Got it. Does your vehicle have blind spot warning? Please respond with yes or no.",
+    VehicleStep.commuting_days: "How many days per week do you commute? Please provide a number between 1 and 7.",
+    VehicleStep.commuting_miles: "How many one-way miles is your commute to work or school? Please provide a positive number.",
+    VehicleStep.annual_mileage: "What is the annual mileage for this vehicle? Please provide a positive number.",
+}
+ADD_VEHICLE_QUESTION = "Would you like to add a vehicle? Please respond with yes or no."
+ADD_ANOTHER_VEHICLE_QUESTION = "Got it. Would you like to add another vehicle? Please respond with yes or no."
+
+
+def completion_message(session: SessionModel, vehicle_count: int) -> str:
+    summary_parts = []
+    if session.zip_code:
+        summary_parts.append(f"Zip Code: {session.zip_code}")
+    if session.full_name:
+        summary_parts.append(f"Full Name: {session.full_name}")
+    if session.email:
+        summary_parts.append(f"Email: {session.email}")
+    if session.license_type:
+        summary_parts.append(f"License Type: {session.license_type.value}")
+    if session.license_status:
+        summary_parts.append(f"License Status: {session.license_status.value}")
+
+    if vehicle_count:
+        summary_parts.append(f"Vehicles: {vehicle_count} vehicle(s) added")
+
+    return (
+        "Thank you! All of your information has been collected. "
+        "I'm connecting you to an agent who will help you with your insurance needs.\n\n"
+        "Here is a summary of what you shared:\n" + "\n".join(summary_parts)
+    )
+
+
+def render_question(session: SessionModel, vehicle_count: int) -> str:
+    """The next question for the session's current state, from templates."""
+    if session.current_step == ChatStep.license_status and session.license_status:
+        return completion_message(session, vehicle_count)
+    if session.current_step != ChatStep.vehicles:
+        return QUESTIONS[session.current_step]
+    if session.vehicle_step is not None:
+        return QUESTIONS[session.vehicle_step]
+    return ADD_ANOTHER_VEHICLE_QUESTION if vehicle_count else ADD_VEHICLE_QUESTION
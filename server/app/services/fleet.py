@@ -0,0 +1,103 @@
+import csv
+import io
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.session import Session as SessionModel
+from app.models.vehicle import Vehicle
+from app.schemas.fleet import FleetImportResponse, FleetImportRow
+from app.services import session_summary
+from app.services.vin_validator import validate_vins
+
+MAX_FLEET_SIZE = 500
+
+
+def parse_vin_csv(raw: bytes) -> List[str]:
+    # uses a "vin" column when there is a header, otherwise the first column
+    text = raw.decode("utf-8-sig", errors="replace")
+    rows = [row for row in csv.reader(io.StringIO(text)) if row and any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "vin" in header:
+        column = header.index("vin")
+        rows = rows[1:]
+    else:
+        column = 0
+    return [row[column].strip() for row in rows if len(row) > column]
+
+
+def _parse_year(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def import_vins(session_id: int, vins: List[str], db: Session) -> FleetImportResponse:
+    existing = {
+        vin for (vin,) in db.query(Vehicle.vin).filter(Vehicle.session_id == session_id, Vehicle.vin.isnot(None)).all()
+    }
+    results = validate_vins(vins)
+
+    rows = []
+    vehicles = []
+    seen = set()
+    for idx, raw_vin in enumerate(vins, 1):
+        vin = raw_vin.strip().upper()
+        result = results[vin]
+
+        if vin in seen:
+            rows.append(FleetImportRow(row=idx, vin=vin, valid=False, error="Duplicate VIN in this import."))
+            continue
+        seen.add(vin)
+
+        if vin in existing:
+            rows.append(FleetImportRow(row=idx, vin=vin, valid=False, error="VIN has already been added to this session."))
+            continue
+
+        if not result.get("valid"):
+            rows.append(FleetImportRow(row=idx, vin=vin, valid=False, error=result.get("error")))
+            continue
+
+        vehicle = Vehicle(
+            session_id=session_id,
+            vin=vin,
+            year=_parse_year(result.get("year")),
+            make=result.get("make"),
+            body_type=result.get("body_type")
+        )
+        vehicles.append(vehicle)
+        rows.append(FleetImportRow(
+            row=idx,
+            vin=vin,
+            valid=True,
+            year=vehicle.year,
+            make=vehicle.make,
+            body_type=vehicle.body_type
+        ))
+
+    # all vehicles in a single transaction; ids come back from the flush
+    db.add_all(vehicles)
+    db.flush()
+    vehicle_ids = iter([vehicle.vehicle_id for vehicle in vehicles])
+    if vehicles:
+        session_summary.apply(session_id, db, new_vehicles=vehicles)
+    db.commit()
+
+    for row in rows:
+        if row.valid:
+            row.vehicle_id = next(vehicle_ids)
+
+    return FleetImportResponse(
+        session_id=session_id,
+        imported=len(vehicles),
+        rejected=len(rows) - len(vehicles),
+        rows=rows
+    )
+
+
+def session_exists(session_id: int, db: Session) -> bool:
+    return db.query(SessionModel.session_id).filter(SessionModel.session_id == session_id).first() is not None
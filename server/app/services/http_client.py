@@ -0,0 +1,293 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import (
+    HTTP_BREAKER_FAILURE_THRESHOLD,
+    HTTP_BREAKER_RESET_SECONDS,
+    HTTP_MAX_PER_HOST,
+    HTTP_RETRIES,
+    HTTP_RETRY_BACKOFF_SECONDS,
+    HTTP_TIMEOUT_SECONDS,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after N consecutive failed requests; one half-open probe after reset_seconds
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        # the allowed request never got an answer from the upstream: no outcome, but a half-open probe is free again
+        with self._lock:
+            self._probing = False
+
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_MAX_PER_HOST, max_retries=0)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+_registry_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+# (host, outcome) -> count
+_counters: Dict[Tuple[str, str], int] = defaultdict(int)
+
+
+def _count(host: str, outcome: str):
+    with _registry_lock:
+        _counters[(host, outcome)] += 1
+
+
+def breaker_for(host: str) -> CircuitBreaker:
+    with _registry_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(HTTP_BREAKER_FAILURE_THRESHOLD, HTTP_BREAKER_RESET_SECONDS)
+        return breaker
+
+
+def _slots_for(host: str) -> threading.BoundedSemaphore:
+    with _registry_lock:
+        slots = _host_slots.get(host)
+        if slots is None:
+            slots = _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+        return slots
+
+
+def backoff_delay(attempt: int) -> float:
+    # full jitter: spreads retries from many workers instead of synchronizing them
+    return random.uniform(0, HTTP_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+
+
+def before_request(host: str) -> CircuitBreaker:
+    breaker = breaker_for(host)
+    if not breaker.allow():
+        _count(host, "circuit_open")
+        raise CircuitOpenError(f"Circuit open for {host}")
+    return breaker
+
+
+def request(
+    method: str,
+    url: str,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    **kwargs
+) -> requests.Response:
+    """
+    Pooled request with per-host concurrency limit, jittered retries and a per-host circuit breaker.
+    Raises UpstreamError (CircuitOpenError when failing fast) instead of blocking on a degraded upstream.
+    """
+    host = urlparse(url).hostname or url
+    timeout = HTTP_TIMEOUT_SECONDS if timeout is None else timeout
+    retries = HTTP_RETRIES if retries is None else retries
+    breaker = before_request(host)
+
+    slots = _slots_for(host)
+    if not slots.acquire(timeout=timeout):
+        # our own limit, not the upstream's fault
+        _count(host, "saturated")
+        breaker.release()
+        raise UpstreamError(f"Too many concurrent requests to {host}")
+
+    try:
+        last_error: Optional[Exception] = None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff_delay(attempt - 1))
+                _count(host, "retry")
+            try:
+                response = _session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                _count(host, "timeout" if isinstance(e, requests.Timeout) else "connection_error")
+                continue
+            except Exception:
+                # a broken body, a redirect loop...: not worth a retry, but still an outcome for the breaker
+                _count(host, "error")
+                breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = UpstreamError(f"{host} returned {response.status_code}")
+                _count(host, "server_error")
+                continue
+
+            _count(host, "success")
+            breaker.record_success()
+            return response
+
+        _count(host, "failure")
+        breaker.record_failure()
+        raise UpstreamError(f"Request to {host} failed: {last_error}")
+    except BaseException:
+        # cancelled or interrupted before an outcome was recorded; a no-op once one was
+        breaker.release()
+        raise
+    finally:
+        slots.release()
+
+
+# asyncio twin of request(): same breakers and counters, httpx connection pool per event loop
+_async_clients: Dict[int, httpx.AsyncClient] = {}
+_async_slots: Dict[Tuple[int, str], asyncio.Semaphore] = {}
+
+
+def _async_client() -> httpx.AsyncClient:
+    loop_id = id(asyncio.get_running_loop())
+    client = _async_clients.get(loop_id)
+    if client is None:
+        client = _async_clients[loop_id] = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=HTTP_MAX_PER_HOST * 4, max_keepalive_connections=HTTP_MAX_PER_HOST)
+        )
+    return client
+
+
+def _async_slots_for(host: str) -> asyncio.Semaphore:
+    key = (id(asyncio.get_running_loop()), host)
+    slots = _async_slots.get(key)
+    if slots is None:
+        slots = _async_slots[key] = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+    return slots
+
+
+async def arequest(
+    method: str,
+    url: str,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    **kwargs
+) -> httpx.Response:
+    host = urlparse(url).hostname or url
+    timeout = HTTP_TIMEOUT_SECONDS if timeout is None else timeout
+    retries = HTTP_RETRIES if retries is None else retries
+    breaker = before_request(host)
+
+    slots = _async_slots_for(host)
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=timeout)
+    except asyncio.TimeoutError:
+        # our own limit, not the upstream's fault
+        _count(host, "saturated")
+        breaker.release()
+        raise UpstreamError(f"Too many concurrent requests to {host}")
+
+    try:
+        last_error: Optional[Exception] = None
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(backoff_delay(attempt - 1))
+                _count(host, "retry")
+            try:
+                response = await _async_client().request(method, url, timeout=timeout, **kwargs)
+            except httpx.TransportError as e:
+                last_error = e
+                _count(host, "timeout" if isinstance(e, httpx.TimeoutException) else "connection_error")
+                continue
+            except Exception:
+                _count(host, "error")
+                breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = UpstreamError(f"{host} returned {response.status_code}")
+                _count(host, "server_error")
+                continue
+
+            _count(host, "success")
+            breaker.record_success()
+            return response
+
+        _count(host, "failure")
+        breaker.record_failure()
+        raise UpstreamError(f"Request to {host} failed: {last_error}")
+    except BaseException:
+        # cancelled or interrupted before an outcome was recorded; a no-op once one was
+        breaker.release()
+        raise
+    finally:
+        slots.release()
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def stats() -> Dict[str, Dict]:
+    with _registry_lock:
+        counters = dict(_counters)
+        breakers = dict(_breakers)
+    return {
+        "requests": counters,
+        "breakers": {host: breaker.state for host, breaker in breakers.items()},
+    }
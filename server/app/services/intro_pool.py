@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+from app.config import INTRO_POOL_REFRESH_SECONDS, INTRO_POOL_SIZE
+from app.db.database import SessionLocal
+from app.schemas.bot_reply import BotReply
+from app.services import messaging as message_service
+
+# offline seed so a new session never waits for the first generation
+BUNDLED_INTROS = [
+    BotReply(
+        content="Hi there, and welcome! I'm here to help you get started with your auto insurance. To begin, could you please share your 5-digit zip code?",
+        valid=False,
+        extracted="none"
+    ),
+    BotReply(
+        content="Hello and welcome! I'll be gathering a few details for your insurance quote. First, what is your 5-digit zip code?",
+        valid=False,
+        extracted="none"
+    ),
+    BotReply(
+        content="Welcome! Thanks for stopping by. Let's get your insurance information together. Could you start by sharing your 5-digit zip code?",
+        valid=False,
+        extracted="none"
+    ),
+]
+
+_intros = deque(BUNDLED_INTROS)
+_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+
+
+def get_intro() -> BotReply:
+    # rotates through the pool; never calls the LLM
+    with _lock:
+        intro = _intros[0]
+        _intros.rotate(-1)
+    return intro
+
+
+def refresh() -> int:
+    generated: List[BotReply] = []
+    db = SessionLocal()
+    try:
+        for _ in range(INTRO_POOL_SIZE):
+            intro = message_service.generate_intro(db)
+            if intro is not message_service.ERROR_REPLY:
+                generated.append(intro)
+    except Exception as e:
+        print(f"Unable to refresh intro pool: {e}")
+    finally:
+        db.close()
+
+    # a partial batch still replaces the pool; keep the old one if nothing came back
+    if generated:
+        with _lock:
+            _intros.clear()
+            _intros.extend(generated)
+    return len(generated)
+
+
+def _refresh_loop():
+    while True:
+        refresh()
+        time.sleep(INTRO_POOL_REFRESH_SECONDS)
+
+
+def start():
+    global _refresh_thread
+    if _refresh_thread and _refresh_thread.is_alive():
+        return
+    _refresh_thread = threading.Thread(target=_refresh_loop, name="intro-pool-refresh", daemon=True)
+    _refresh_thread.start()
@@ -0,0 +1,478 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.config import (
+    LLM_PROVIDER,
+    LLM_RECORDINGS_PATH,
+    LLM_STUB_ERROR_RATE,
+    LLM_STUB_JITTER_MS,
+    LLM_STUB_LATENCY_MS,
+    LLM_STUB_SEED,
+)
+from app.schemas.bot_reply import SCHEMA_NAME_PREFIX
+from app.services import context
+
+# every backend takes the chat.completions.create keyword arguments and returns objects
+# shaped like the openai sdk's: completion.choices[0].message (role, content, tool_calls, refusal)
+# and completion.usage; astream yields chunks with choices[0].delta and a final usage chunk
+
+
+class LLMProviderError(Exception):
+    pass
+
+
+class StubProviderError(LLMProviderError):
+    pass
+
+
+class ReplayMissError(LLMProviderError, LookupError):
+    pass
+
+
+class LLMProvider:
+    name = "base"
+
+    def complete(self, **kwargs):
+        raise NotImplementedError
+
+    async def acomplete(self, **kwargs):
+        raise NotImplementedError
+
+    async def astream(self, **kwargs) -> AsyncIterator[Any]:
+        # backends without native streaming replay the finished completion as chunks
+        kwargs.pop("stream_options", None)
+        completion = await self.acomplete(**kwargs)
+        for chunk in _chunks_from_completion(completion):
+            yield chunk
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def complete(self, **kwargs):
+        from app.services.openai_client import get_client
+        return get_client().chat.completions.create(**kwargs)
+
+    async def acomplete(self, **kwargs):
+        from app.services.openai_client import get_async_client
+        return await get_async_client().chat.completions.create(**kwargs)
+
+    async def astream(self, **kwargs) -> AsyncIterator[Any]:
+        from app.services.openai_client import get_async_client
+        stream = await get_async_client().chat.completions.create(stream=True, **kwargs)
+        async for chunk in stream:
+            yield chunk
+
+
+def _namespace(value):
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_namespace(v) for v in value]
+    return value
+
+
+def _plain(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    if isinstance(value, SimpleNamespace):
+        return {k: _plain(v) for k, v in vars(value).items() if v is not None}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _usage(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Dict[str, Any]:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+    }
+
+
+def _completion_from_dict(data: Dict[str, Any]):
+    message = dict(data["choices"][0]["message"])
+    message.setdefault("role", "assistant")
+    message.setdefault("content", None)
+    message.setdefault("tool_calls", None)
+    message.setdefault("refusal", None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=_namespace(message), finish_reason=data["choices"][0].get("finish_reason"))],
+        usage=_namespace(data.get("usage")),
+    )
+
+
+def _chunks_from_completion(completion, piece_size: int = 12) -> List[Any]:
+    message = completion.choices[0].message
+    chunks = []
+    content = message.content or ""
+    for start in range(0, len(content), piece_size):
+        chunks.append({"choices": [{"delta": {"content": content[start:start + piece_size], "tool_calls": None}}], "usage": None})
+    for index, tool_call in enumerate(message.tool_calls or []):
+        chunks.append({"choices": [{"delta": {"content": None, "tool_calls": [{
+            "index": index,
+            "id": tool_call.id,
+            "function": {"name": tool_call.function.name, "arguments": tool_call.function.arguments},
+        }]}}], "usage": None})
+    chunks.append({"choices": [], "usage": _plain(completion.usage)})
+    return [_namespace(chunk) for chunk in chunks]
+
+
+def _assemble(chunks: List[Any]) -> Dict[str, Any]:
+    # the finished completion a stream adds up to, in the non-streaming shape
+    content = []
+    tool_calls = {}
+    usage = None
+    for chunk in chunks:
+        if getattr(chunk, "usage", None):
+            usage = _plain(chunk.usage)
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content.append(delta.content)
+        for fragment in delta.tool_calls or []:
+            tool_call = tool_calls.setdefault(fragment.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            if fragment.id:
+                tool_call["id"] = fragment.id
+            if fragment.function and fragment.function.name:
+                tool_call["function"]["name"] += fragment.function.name
+            if fragment.function and fragment.function.arguments:
+                tool_call["function"]["arguments"] += fragment.function.arguments
+    message = {"role": "assistant", "content": "".join(content) or None}
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+    return {"choices": [{"message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}], "usage": usage}
+
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    """Identifies a request for record/replay; transport options (stream, stream_options) do not count."""
+    relevant = {k: kwargs.get(k) for k in ("model", "messages", "tools", "tool_choice", "response_format")}
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RecordingProvider(LLMProvider):
+    """Passes every request to the inner provider and appends {key, response} to a jsonl file."""
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, path: Path = LLM_RECORDINGS_PATH):
+        self.inner = inner
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _record(self, kwargs: Dict[str, Any], response: Dict[str, Any]):
+        line = json.dumps({"key": request_key(kwargs), "response": response})
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a") as f:
+                    f.write(line + "\n")
+        except OSError as e:
+            print(f"Unable to record llm completion: {e}")
+
+    def complete(self, **kwargs):
+        completion = self.inner.complete(**kwargs)
+        self._record(kwargs, _plain(completion))
+        return completion
+
+    async def acomplete(self, **kwargs):
+        completion = await self.inner.acomplete(**kwargs)
+        self._record(kwargs, _plain(completion))
+        return completion
+
+    async def astream(self, **kwargs) -> AsyncIterator[Any]:
+        chunks = []
+        async for chunk in self.inner.astream(**kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self._record(kwargs, _assemble(chunks))
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Serves completions captured by RecordingProvider, offline and without latency.
+    Requests seen several times get their responses in recorded order, the last one repeating.
+    """
+    name = "replay"
+
+    def __init__(self, path: Path = LLM_RECORDINGS_PATH):
+        self.path = Path(path)
+        self._responses: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with self.path.open() as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses[entry["key"]].append(entry["response"])
+
+    def complete(self, **kwargs):
+        key = request_key(kwargs)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise ReplayMissError(f"No recorded completion for request {key[:12]} in {self.path}")
+            response = responses[min(self._served[key], len(responses) - 1)]
+            self._served[key] += 1
+        return _completion_from_dict(response)
+
+    async def acomplete(self, **kwargs):
+        return self.complete(**kwargs)
+
+
+# offline stub: a scripted agent that answers per step, enough to drive the whole flow in load tests and demos
+
+_ZIP = re.compile(r"\b(\d{5})\b")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_VIN = re.compile(r"\b([A-HJ-NPR-Z0-9]{17})\b", re.IGNORECASE)
+_YEAR_MAKE_BODY = re.compile(r"\b(19\d{2}|20[0-2]\d)\s+([A-Za-z]+)\s+([A-Za-z]+)")
+_INT = re.compile(r"^\s*(\d+)\s*$")
+_ESCALATE = re.compile(r"\b(human|agent|real person|frustrat\w*|angry|skip this|stop)\b", re.IGNORECASE)
+_YES = {"yes", "y", "yeah", "yep", "sure", "ok", "okay"}
+_NO = {"no", "n", "nope", "nah"}
+
+
+def _yes_no(text: str) -> Optional[str]:
+    word = text.lower().strip().rstrip("!.")
+    if word in _YES:
+        return "true"
+    if word in _NO:
+        return "false"
+    return None
+
+
+def _option(options: List[str]) -> Callable[[str], Optional[str]]:
+    def extract(text: str) -> Optional[str]:
+        found = [o for o in options if o in text.lower()]
+        return found[0] if len(found) == 1 else None
+    return extract
+
+
+def _int_between(low: int, high: int) -> Callable[[str], Optional[str]]:
+    def extract(text: str) -> Optional[str]:
+        match = _INT.match(text)
+        return match.group(1) if match and low <= int(match.group(1)) <= high else None
+    return extract
+
+
+def _match(pattern: re.Pattern) -> Callable[[str], Optional[str]]:
+    def extract(text: str) -> Optional[str]:
+        match = pattern.search(text)
+        return match.group(1) if match and match.groups() else (match.group(0) if match else None)
+    return extract
+
+
+def _full_name(text: str) -> Optional[str]:
+    words = text.strip().split()
+    return " ".join(words) if len(words) >= 2 and all(w.replace("-", "").replace("'", "").isalpha() for w in words) else None
+
+
+def _blind_spot(text: str) -> Optional[str]:
+    answer = _yes_no(text)
+    return {"true": "yes", "false": "no"}.get(answer)
+
+
+def _vehicle(text: str) -> Optional[str]:
+    vin = _VIN.search(text)
+    if vin:
+        return vin.group(1).upper()
+    match = _YEAR_MAKE_BODY.search(text)
+    return " ".join(match.groups()) if match else None
+
+
+# step -> (question, marker, extract); the step comes from the response_format schema name.
+# the marker tells whether the last bot message asked this step's question
+STUB_STEPS: Dict[str, Tuple[str, str, Callable[[str], Optional[str]]]] = {
+    "zip_code": ("Could you please share your 5-digit zip code?", "zip code", _match(_ZIP)),
+    "full_name": ("What is your full name?", "full name", _full_name),
+    "email": ("What is your email address?", "email", _match(_EMAIL)),
+    "add_vehicle": ("Would you like to add a vehicle? (yes/no)", "add a vehicle", _yes_no),
+    "vin_or_year_make_body": ("Please provide the vehicle's VIN, or its year, make and body type (e.g., 2019 Ford Sedan).", "vin", _vehicle),
+    "use": ("How is this vehicle used: commuting, commercial, farming or business?", "vehicle used", _option(["commuting", "commercial", "farming", "business"])),
+    "blind_spot": ("Is the vehicle equipped with a blind spot warning system? (yes/no)", "blind spot", _blind_spot),
+    "commuting_days": ("How many days per week do you commute with this vehicle (1-7)?", "days per week", _int_between(1, 7)),
+    "commuting_miles": ("How many one-way miles is your commute?", "one-way miles", _int_between(1, 1000)),
+    "annual_mileage": ("What is the vehicle's annual mileage?", "annual mileage", _int_between(1, 500000)),
+    "license_type": ("What type of driver's license do you have: personal, commercial or foreign?", "license do you have", _option(["personal", "commercial", "foreign"])),
+    "license_status": ("Is your license valid or suspended?", "valid or suspended", _option(["valid", "suspended"])),
+}
+
+# the question after a step whose prompt has the model ask it in the same reply (State.reply_asks_next in
+# services/conversation.py): the state machine keeps that reply as the turn's message. other steps get a
+# plain acknowledgement, which it replaces with its own question. add_vehicle's next question depends on
+# the answer, so the stub only acknowledges it
+_STUB_NEXT = {"zip_code": "full_name", "full_name": "email", "email": "add_vehicle", "license_type": "license_status"}
+
+
+class StubProvider(LLMProvider):
+    """
+    Deterministic, offline stand-in for the model. Answers every step with a schema-valid reply,
+    calls the validation and quote tools the way the prompts ask, and can add latency and errors.
+    """
+    name = "stub"
+
+    def __init__(
+        self,
+        latency_ms: float = LLM_STUB_LATENCY_MS,
+        jitter_ms: float = LLM_STUB_JITTER_MS,
+        error_rate: float = LLM_STUB_ERROR_RATE,
+        seed: int = LLM_STUB_SEED
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def _draw(self) -> Tuple[float, bool]:
+        # both draws happen under the lock so a seed reproduces the same run
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            fail = self.error_rate > 0 and self._random.random() < self.error_rate
+            self._calls += 1
+        return max(0.0, self.latency_ms + jitter) / 1000, fail
+
+    def complete(self, **kwargs):
+        delay, fail = self._draw()
+        time.sleep(delay)
+        if fail:
+            raise StubProviderError("stub provider injected error")
+        return self._respond(kwargs)
+
+    async def acomplete(self, **kwargs):
+        delay, fail = self._draw()
+        await asyncio.sleep(delay)
+        if fail:
+            raise StubProviderError("stub provider injected error")
+        return self._respond(kwargs)
+
+    def _respond(self, kwargs: Dict[str, Any]):
+        messages = kwargs.get("messages") or []
+        step = self._step(kwargs)
+        tool_names = {t["function"]["name"] for t in kwargs.get("tools") or []}
+
+        # last_bot is the bot message the last user message answered
+        last_user = None
+        last_bot = None
+        bot = None
+        tool_results = []
+        for message in messages:
+            if message.get("role") == "user":
+                last_user = message.get("content") or ""
+                last_bot = bot
+                tool_results = []
+            elif message.get("role") == "assistant" and message.get("content"):
+                bot = message.get("content")
+            elif message.get("role") == "tool":
+                tool_results.append(json.loads(message.get("content") or "{}"))
+
+        if tool_results:
+            reply = self._reply_from_tools(step, last_user or "", tool_results)
+        elif last_user is None:
+            question = STUB_STEPS.get(step, STUB_STEPS["zip_code"])[0]
+            reply = {"content": f"Hi there, and welcome! I'm here to help you with your auto insurance. {question}", "valid": False, "extracted": "none"}
+        else:
+            tool_call = self._tool_call(step, last_user, last_bot, tool_names, kwargs.get("tool_choice"))
+            if tool_call:
+                return self._completion(messages, None, [tool_call])
+            reply = self._reply(step, last_user, last_bot)
+        return self._completion(messages, json.dumps(reply), None)
+
+    def _step(self, kwargs: Dict[str, Any]) -> str:
+        response_format = kwargs.get("response_format") or {}
+        name = (response_format.get("json_schema") or {}).get("name", "")
+        return name[len(SCHEMA_NAME_PREFIX):] if name.startswith(SCHEMA_NAME_PREFIX) else "zip_code"
+
+    def _tool_call(self, step: str, text: str, last_bot: Optional[str], tool_names: set, tool_choice) -> Optional[Dict[str, Any]]:
+        if tool_choice == "none":
+            return None
+        answering = last_bot is None or STUB_STEPS[step][1] in last_bot.lower() if step in STUB_STEPS else False
+        if "get_inspirational_quote" in tool_names and _ESCALATE.search(text):
+            name, arguments = "get_inspirational_quote", {}
+        elif not answering:
+            return None
+        elif step == "vin_or_year_make_body" and "validate_vin" in tool_names and _VIN.search(text):
+            name, arguments = "validate_vin", {"vin": _VIN.search(text).group(1).upper()}
+        elif step == "vin_or_year_make_body" and "validate_vehicle_info" in tool_names and _YEAR_MAKE_BODY.search(text):
+            year, make, body_type = _YEAR_MAKE_BODY.search(text).groups()
+            name, arguments = "validate_vehicle_info", {"year": int(year), "make": make, "body_type": body_type}
+        else:
+            return None
+        with self._lock:
+            call_id = f"call_stub_{self._calls}"
+        return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+    def _reply_from_tools(self, step: str, text: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        for result in results:
+            if "quote" in result:
+                return {
+                    "content": f"I understand. Here's something to keep in mind: \"{result['quote']}\" - {result.get('author', 'Unknown')}. I'm connecting you to an agent now.",
+                    "valid": True,
+                    "extracted": "connect_to_agent"
+                }
+        if all(result.get("valid") for result in results):
+            return {"content": "Thanks, that vehicle checks out.", "valid": True, "extracted": _vehicle(text) or "none"}
+        errors = "; ".join(result.get("error", "Unknown error") for result in results if not result.get("valid"))
+        return {"content": f"Sorry, I couldn't validate that vehicle: {errors} {STUB_STEPS[step][0]}", "valid": False, "extracted": "none"}
+
+    def _reply(self, step: str, text: str, last_bot: Optional[str]) -> Dict[str, Any]:
+        question, marker, extract = STUB_STEPS.get(step, STUB_STEPS["zip_code"])
+        if last_bot is not None and marker not in last_bot.lower():
+            # the user answered an earlier step (a follow-up turn after a transition): ask this step's question
+            return {"content": question, "valid": False, "extracted": "none"}
+        extracted = extract(text)
+        if extracted is None:
+            return {"content": f"Sorry, I didn't catch that. {question}", "valid": False, "extracted": "none"}
+        if step == "license_status":
+            return {"content": "Thank you, that's everything we need. I'm connecting you to an agent now.", "valid": True, "extracted": extracted}
+        if step in _STUB_NEXT:
+            return {"content": f"Thanks! {STUB_STEPS[_STUB_NEXT[step]][0]}", "valid": True, "extracted": extracted}
+        return {"content": "Thanks, got it.", "valid": True, "extracted": extracted}
+
+    def _completion(self, messages: List[Dict[str, Any]], content: Optional[str], tool_calls: Optional[List[Dict[str, Any]]]):
+        prompt_tokens = sum(context.count_tokens(m.get("content") or "") + context.MESSAGE_OVERHEAD_TOKENS for m in messages)
+        completion_tokens = context.count_tokens(content or json.dumps(tool_calls))
+        return _completion_from_dict({
+            "choices": [{
+                "message": {"role": "assistant", "content": content, "tool_calls": tool_calls},
+                "finish_reason": "tool_calls" if tool_calls else "stop"
+            }],
+            "usage": _usage(prompt_tokens, completion_tokens)
+        })
+
+
+_provider: Optional[LLMProvider] = None
+_provider_lock = threading.Lock()
+
+
+def build_provider(name: str = LLM_PROVIDER) -> LLMProvider:
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "stub":
+        return StubProvider()
+    if name == "record":
+        return RecordingProvider(OpenAIProvider())
+    if name == "replay":
+        return ReplayProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER {name!r}. Expected one of: openai, stub, record, replay")
+
+
+def get_provider() -> LLMProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = build_provider()
+    return _provider
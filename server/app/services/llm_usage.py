@@ -0,0 +1,68 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import PROMPT_VERSION
+from app.models.llm_usage import LlmUsage
+
+_lock = threading.Lock()
+
+# (prompt_version, kind) -> tokens, kind is prompt / cached / completion
+_tokens: Dict[Tuple[str, str], int] = defaultdict(int)
+_completions: Dict[str, int] = defaultdict(int)
+
+
+def _counts(usage) -> Tuple[int, int, int]:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(details, "cached_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+
+def add(session_id: Optional[int], model: str, usage, db) -> Optional[LlmUsage]:
+    """Adds the usage row to db without committing, so it is stored with the caller's next commit."""
+    if usage is None:
+        return None
+    prompt_tokens, cached_tokens, completion_tokens = _counts(usage)
+
+    with _lock:
+        _completions[PROMPT_VERSION] += 1
+        _tokens[(PROMPT_VERSION, "prompt")] += prompt_tokens
+        _tokens[(PROMPT_VERSION, "cached")] += cached_tokens
+        _tokens[(PROMPT_VERSION, "completion")] += completion_tokens
+
+    row = LlmUsage(
+        session_id=session_id,
+        model=model,
+        prompt_version=PROMPT_VERSION,
+        prompt_tokens=prompt_tokens,
+        cached_tokens=cached_tokens,
+        completion_tokens=completion_tokens
+    )
+    db.add(row)
+    return row
+
+
+def record(session_id: Optional[int], model: str, usage, db: Session) -> Optional[LlmUsage]:
+    """Stores the token counts of one completion. Never raises: accounting must not fail a turn."""
+    try:
+        row = add(session_id, model, usage, db)
+        if row is not None:
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Unable to record llm usage: {e}")
+        return None
+    return row
+
+
+def stats() -> Dict[str, Dict]:
+    with _lock:
+        return {
+            "completions": dict(_completions),
+            "tokens": dict(_tokens),
+        }
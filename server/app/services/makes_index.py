@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import NHTSA_MAKES_SNAPSHOT_PATH, NHTSA_MAKES_TTL_SECONDS
+from app.services import http_client
+
+GET_ALL_MAKES_URL = "https://vpic.nhtsa.dot.gov/api/vehicles/GetAllMakes?format=json"
+
+# normalized make name -> (Make_ID, canonical Make_Name)
+_index: Dict[str, Tuple[int, str]] = {}
+_loaded_at = 0.0
+_lock = threading.Lock()
+_refresh_thread: Optional[threading.Thread] = None
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]")
+
+
+def normalize_make(name: str) -> str:
+    # "Mercedes-Benz", "mercedes benz" and "MERCEDES BENZ" all map to the same key
+    return _NON_ALNUM.sub("", (name or "").lower())
+
+
+def _build_index(results) -> Dict[str, Tuple[int, str]]:
+    index = {}
+    for m in results:
+        make_name = (m.get("Make_Name") or "").strip()
+        key = normalize_make(make_name)
+        if key and key not in index:
+            index[key] = (m.get("Make_ID"), make_name)
+    return index
+
+
+def _swap(index: Dict[str, Tuple[int, str]], loaded_at: float):
+    global _index, _loaded_at
+    with _lock:
+        _index = index
+        _loaded_at = loaded_at
+
+
+def _load_snapshot() -> bool:
+    path = NHTSA_MAKES_SNAPSHOT_PATH
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        index = {key: (value[0], value[1]) for key, value in data.get("makes", {}).items()}
+    except (OSError, ValueError, TypeError, IndexError):
+        return False
+
+    if not index:
+        return False
+    _swap(index, data.get("loaded_at") or os.path.getmtime(path))
+    return True
+
+
+def _write_snapshot(index: Dict[str, Tuple[int, str]], loaded_at: float):
+    path = NHTSA_MAKES_SNAPSHOT_PATH
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"loaded_at": loaded_at, "makes": index}, f)
+        os.replace(tmp_path, path) # atomic, so readers never see a half-written file
+    except OSError as e:
+        print(f"Unable to write NHTSA makes snapshot: {e}")
+
+
+def refresh() -> bool:
+    try:
+        response = http_client.get(GET_ALL_MAKES_URL, timeout=10)
+        if response.status_code != 200:
+            return False
+        index = _build_index(response.json().get("Results", []))
+    except Exception as e:
+        print(f"Unable to refresh NHTSA makes index: {e}")
+        return False
+
+    if not index:
+        return False
+
+    loaded_at = time.time()
+    _swap(index, loaded_at)
+    _write_snapshot(index, loaded_at)
+    return True
+
+
+def is_stale() -> bool:
+    return time.time() - _loaded_at >= NHTSA_MAKES_TTL_SECONDS
+
+
+def is_loaded() -> bool:
+    return bool(_index)
+
+
+def ensure_loaded() -> bool:
+    # cold start: snapshot first, network only if there is no snapshot
+    if _index:
+        return True
+    return _load_snapshot() or refresh()
+
+
+def lookup(make: str) -> Optional[Tuple[int, str]]:
+    return _index.get(normalize_make(make))
+
+
+def _refresh_loop():
+    while True:
+        if is_stale():
+            refresh()
+        time.sleep(max(min(NHTSA_MAKES_TTL_SECONDS, 60 * 60), 60))
+
+
+def start():
+    global _refresh_thread
+    _load_snapshot()
+
+    if _refresh_thread and _refresh_thread.is_alive():
+        return
+    _refresh_thread = threading.Thread(target=_refresh_loop, name="nhtsa-makes-refresh", daemon=True)
+    _refresh_thread.start()
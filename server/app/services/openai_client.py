@@ -1,6 +1,7 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 env_path = Path(__file__).parent.parent.parent / '.env'
@@ -8,4 +9,18 @@ load_dotenv(dotenv_path=env_path)
 
 raw_key = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=raw_key)
\ No newline at end of file
+# built on first use, so the stub and replay providers run without an api key
+_client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+
+def get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=raw_key)
+    return _client
+
+def get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=raw_key)
+    return _async_client
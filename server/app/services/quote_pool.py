@@ -0,0 +1,84 @@
+import random
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from app.config import QUOTE_POOL_REFILL_SECONDS, QUOTE_POOL_SIZE
+from app.services import http_client
+
+ZENQUOTES_URL = "https://zenquotes.io?api=quotes"
+
+# offline seed so the tool always has something to hand out
+BUNDLED_QUOTES = [
+    {"quote": "The greatest mistake you can make in life is to be continually fearing you will make one.", "author": "Elbert Hubbard"},
+    {"quote": "Patience is not the ability to wait, but the ability to keep a good attitude while waiting.", "author": "Joyce Meyer"},
+    {"quote": "It does not matter how slowly you go as long as you do not stop.", "author": "Confucius"},
+    {"quote": "Difficulties strengthen the mind, as labor does the body.", "author": "Seneca"},
+    {"quote": "Keep your face always toward the sunshine, and shadows will fall behind you.", "author": "Walt Whitman"},
+    {"quote": "The best way out is always through.", "author": "Robert Frost"},
+    {"quote": "Act as if what you do makes a difference. It does.", "author": "William James"},
+    {"quote": "In the middle of every difficulty lies opportunity.", "author": "Albert Einstein"},
+    {"quote": "You cannot control the wind, but you can adjust your sails.", "author": "Thomas S. Monson"},
+    {"quote": "With the new day comes new strength and new thoughts.", "author": "Eleanor Roosevelt"},
+    {"quote": "Calm mind brings inner strength and self-confidence.", "author": "Dalai Lama"},
+    {"quote": "Believe you can and you're halfway there.", "author": "Theodore Roosevelt"},
+    {"quote": "What lies behind us and what lies before us are tiny matters compared to what lies within us.", "author": "Ralph Waldo Emerson"},
+    {"quote": "Start where you are. Use what you have. Do what you can.", "author": "Arthur Ashe"},
+    {"quote": "No act of kindness, no matter how small, is ever wasted.", "author": "Aesop"},
+    {"quote": "This too shall pass.", "author": "Persian proverb"},
+]
+
+_fresh: deque = deque(maxlen=QUOTE_POOL_SIZE)
+_bundled = deque(random.sample(BUNDLED_QUOTES, len(BUNDLED_QUOTES)))
+_lock = threading.Lock()
+_wake = threading.Event()
+_refill_thread: Optional[threading.Thread] = None
+
+
+def get_quote() -> Dict[str, any]:
+    # never touches the network; asks the background thread to top up when running low
+    with _lock:
+        if _fresh:
+            result = {**_fresh.popleft(), "success": True}
+        else:
+            result = {**_bundled[0], "success": True, "note": "Bundled quote used"}
+            _bundled.rotate(-1)
+        low = len(_fresh) < QUOTE_POOL_SIZE // 4
+
+    if low:
+        _wake.set()
+    return result
+
+
+def refill() -> int:
+    try:
+        response = http_client.get(ZENQUOTES_URL)
+        quotes = response.json() if response.status_code == 200 else []
+    except Exception as e:
+        print(f"Unable to refill quote pool: {e}")
+        return 0
+
+    added = 0
+    with _lock:
+        for q in quotes:
+            # zenquotes answers rate-limited requests with a "quote" authored by itself
+            if q.get("q") and q.get("a") != "zenquotes.io" and len(_fresh) < QUOTE_POOL_SIZE:
+                _fresh.append({"quote": q["q"], "author": q.get("a") or "Unknown"})
+                added += 1
+    return added
+
+
+def _refill_loop():
+    while True:
+        if len(_fresh) < QUOTE_POOL_SIZE:
+            refill()
+        _wake.wait(timeout=QUOTE_POOL_REFILL_SECONDS)
+        _wake.clear()
+
+
+def start():
+    global _refill_thread
+    if _refill_thread and _refill_thread.is_alive():
+        return
+    _refill_thread = threading.Thread(target=_refill_loop, name="quote-pool-refill", daemon=True)
+    _refill_thread.start()
@@ -1,17 +1,23 @@
-from typing import Optional, Any
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import update as sa_update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.session import Session as SessionModel
 from app.models.message import Message
+from app.models.vehicle import Vehicle
 from app.enums.chat_step import ChatStep
 from app.enums.vehicle_step import VehicleStep
 from app.enums.sender import Sender
 from app.enums.license_status import LicenseStatus
 from app.enums.license_type import LicenseType
+from app.services import session_summary
+from app.services import vehicle as vehicle_service
 
 def create_session(db: Session):
     session = SessionModel(
         current_step=ChatStep.zip_code,
-        vehicle_step=None
+        vehicle_step=None,
+        summary=session_summary.updated(session_summary.empty(), {"current_step": ChatStep.zip_code})
     )
     db.add(session)
     db.commit()
@@ -38,13 +44,48 @@ def add_message(
 
     return message
 
-def save (
+def update(
     session_id: int,
     db: Session,
-    attribute: str,
-    value: Any
-):
-    ses = db.query(SessionModel).filter(SessionModel.session_id == session_id).first()
-    setattr(ses, attribute, value)
-    db.commit()
-    db.refresh(ses)
\ No newline at end of file
+    changes: Optional[Dict[str, Any]] = None,
+    vehicle_changes: Optional[Dict[int, Dict[str, Any]]] = None,
+    new_vehicles: Sequence[Vehicle] = (),
+    commit: bool = True
+) -> Tuple[Optional[SessionModel], List[Vehicle]]:
+    """
+    Applies a batch of attribute changes to a session and/or its vehicles (keyed by vehicle_id):
+    one UPDATE ... RETURNING per row and a single commit, nothing read first; an unknown session
+    returns (None, []). Loaded objects are refreshed in place. The session's UPDATE also takes the
+    row's lock and returns its summary document as other writers left it; the changes and
+    new_vehicles (inserted in this transaction) are applied to that and stored with one more UPDATE.
+    commit=False leaves the commit to the caller's transaction. Unknown attributes raise ValueError.
+    """
+    changes = vehicle_service.checked_changes(SessionModel, changes or {})
+    if not (changes or vehicle_changes or new_vehicles):
+        return None, []
+
+    session = db.execute(
+        sa_update(SessionModel)
+        .where(SessionModel.session_id == session_id)
+        .values(**changes, summary=SessionModel.summary)
+        .returning(SessionModel),
+        execution_options={"populate_existing": True}
+    ).scalar_one_or_none()
+    if session is None:
+        return None, []
+
+    vehicles = []
+    for vehicle_id, attributes in (vehicle_changes or {}).items():
+        vehicle = vehicle_service.update(vehicle_id, db, attributes, session_id=session_id, commit=False)
+        if vehicle is not None:
+            vehicles.append(vehicle)
+
+    summary = session_summary.updated(
+        session_summary.stored(session_id, session.summary, db), changes, vehicle_changes, new_vehicles
+    )
+    session_summary.store(session_id, summary, db)
+    set_committed_value(session, "summary", summary)
+
+    if commit:
+        db.commit()
+    return session, vehicles
@@ -0,0 +1,119 @@
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update as sa_update
+from sqlalchemy.orm import Session
+
+from app.models.session import Session as SessionModel
+from app.models.vehicle import Vehicle
+
+# the session as one json document (sessions.summary), kept current by turns, saves and fleet imports,
+# so an agent handoff reads one row instead of querying and formatting the session again. writers apply
+# their changes to the document as stored under the row's lock, so concurrent writers don't drop each
+# other's changes. sessions stored before the document existed get it built from the rows on first use
+
+SESSION_FIELDS = ["current_step", "vehicle_step", "zip_code", "full_name", "email", "license_type", "license_status"]
+VEHICLE_FIELDS = [
+    "vin", "year", "make", "body_type", "vehicle_use", "blind_spot_warning_equipped",
+    "days_per_week", "one_way_miles", "annual_mileage"
+]
+
+
+def _json_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def empty() -> Dict[str, Any]:
+    summary = {field: None for field in SESSION_FIELDS}
+    summary["vehicles"] = []
+    summary["complete"] = False
+    return summary
+
+
+def updated(
+    summary: Dict[str, Any],
+    changes: Optional[Dict[str, Any]] = None,
+    vehicle_changes: Optional[Dict[int, Dict[str, Any]]] = None,
+    new_vehicles: Iterable[Vehicle] = ()
+) -> Dict[str, Any]:
+    """A new document with the changes applied; the one passed in is left alone so the json column sees a new value."""
+    result = {**summary, "vehicles": [dict(vehicle) for vehicle in summary.get("vehicles", [])]}
+    for field, value in (changes or {}).items():
+        if field in SESSION_FIELDS:
+            result[field] = _json_value(value)
+
+    by_id = {vehicle["vehicle_id"]: vehicle for vehicle in result["vehicles"]}
+    for vehicle in new_vehicles:
+        if vehicle.vehicle_id not in by_id:
+            by_id[vehicle.vehicle_id] = {"vehicle_id": vehicle.vehicle_id, **{field: None for field in VEHICLE_FIELDS}}
+            result["vehicles"].append(by_id[vehicle.vehicle_id])
+        by_id[vehicle.vehicle_id].update({field: _json_value(getattr(vehicle, field)) for field in VEHICLE_FIELDS})
+    for vehicle_id, attributes in (vehicle_changes or {}).items():
+        if vehicle_id in by_id:
+            by_id[vehicle_id].update({field: _json_value(value) for field, value in attributes.items() if field in VEHICLE_FIELDS})
+
+    result["complete"] = result["license_status"] is not None
+    return result
+
+
+def build(session: SessionModel, vehicles: List[Vehicle]) -> Dict[str, Any]:
+    # from the rows, for sessions stored before the summary existed
+    return updated(empty(), {field: getattr(session, field) for field in SESSION_FIELDS}, new_vehicles=vehicles)
+
+
+def _lock(session_id: int, db: Session) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Locks the session's row for the rest of the caller's transaction (a no-op write: the row lock on
+    postgres, the write lock on sqlite) and returns (found, stored document) as of the lock.
+    """
+    row = db.execute(
+        sa_update(SessionModel).where(SessionModel.session_id == session_id)
+        .values(summary=SessionModel.summary).returning(SessionModel.summary),
+        execution_options={"synchronize_session": False}
+    ).first()
+    return (False, None) if row is None else (True, row.summary)
+
+
+def stored(session_id: int, summary: Optional[Dict[str, Any]], db: Session) -> Dict[str, Any]:
+    # the document read under the lock, or built from the rows for a session that doesn't have one yet
+    if summary is not None:
+        return summary
+    vehicles = db.scalars(select(Vehicle).where(Vehicle.session_id == session_id).order_by(Vehicle.vehicle_id)).all()
+    return build(db.get(SessionModel, session_id), vehicles)
+
+
+def apply(
+    session_id: int,
+    db: Session,
+    changes: Optional[Dict[str, Any]] = None,
+    vehicle_changes: Optional[Dict[int, Dict[str, Any]]] = None,
+    new_vehicles: Iterable[Vehicle] = ()
+) -> Optional[Dict[str, Any]]:
+    """Applies a delta to the stored document under the row's lock, in the caller's transaction; None for an unknown session."""
+    found, summary = _lock(session_id, db)
+    if not found:
+        return None
+    summary = updated(stored(session_id, summary, db), changes, vehicle_changes, new_vehicles)
+    store(session_id, summary, db)
+    return summary
+
+
+def load(session_id: int, db: Session) -> Optional[Dict[str, Any]]:
+    """
+    The session's summary in one single-row read; None for an unknown session. A session without one
+    gets it built and stored in the caller's transaction, so only its first read pays for the rows.
+    """
+    row = db.execute(select(SessionModel.summary).where(SessionModel.session_id == session_id)).first()
+    if row is None:
+        return None
+    if row.summary is not None:
+        return row.summary
+    return apply(session_id, db)
+
+
+def store(session_id: int, summary: Dict[str, Any], db: Session):
+    # part of the caller's transaction
+    db.execute(
+        sa_update(SessionModel).where(SessionModel.session_id == session_id).values(summary=summary),
+        execution_options={"synchronize_session": False}
+    )
@@ -0,0 +1,66 @@
+import json
+import re
+from typing import Any
+
+# the reply is a {"content", "valid", "extracted"} json object; only "content" is user-facing text
+CONTENT_KEY_PATTERN = re.compile(r'"content"\s*:\s*"')
+JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ContentFieldStream:
+    """
+    Decodes the "content" string of a reply incrementally as completion deltas arrive,
+    so the text can be forwarded to the client before the json object is complete.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None
+        self.done = False
+
+    def feed(self, delta: str) -> str:
+        self.buffer += delta
+        if self.done:
+            return ""
+        if self.position is None:
+            match = CONTENT_KEY_PATTERN.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+
+        buffer = self.buffer
+        i = self.position
+        decoded = []
+        while i < len(buffer):
+            ch = buffer[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                decoded.append(ch)
+                i += 1
+                continue
+
+            # escape split across deltas: wait for the rest of it
+            if i + 1 >= len(buffer):
+                break
+            escape = buffer[i + 1]
+            if escape == "u":
+                if i + 6 > len(buffer):
+                    break
+                try:
+                    decoded.append(chr(int(buffer[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+            else:
+                decoded.append(JSON_ESCAPES.get(escape, escape))
+                i += 2
+
+        self.position = i
+        return "".join(decoded)
+
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
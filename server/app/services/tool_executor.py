@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import TOOL_DEADLINE_SECONDS
+from app.services import quote_pool
+from app.services.vin_validator import avalidate_vehicle_info, avalidate_vin
+
+def _args_error(function_name: str, function_args: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if function_name == "validate_vin" and not function_args.get("vin"):
+        return {
+            "valid": False,
+            "error": "VIN is required."
+        }
+    if function_name == "validate_vehicle_info":
+        body_type = function_args.get("body_type")
+        if not function_args.get("year") or not function_args.get("make"):
+            return {
+                "valid": False,
+                "error": "Year and make are required."
+            }
+        if not body_type or not body_type.strip():
+            return {
+                "valid": False,
+                "error": "Body type is required. Please provide the vehicle body type (e.g., Sedan, SUV, Truck, Coupe)."
+            }
+    return None
+
+
+def _error(function_name: str, message: str) -> Dict[str, Any]:
+    return {
+        "valid": False,
+        "error": f"Error running {function_name}: {message}"
+    }
+
+
+def _parse(tool_call) -> Tuple[Tuple[str, str], Optional[Dict[str, Any]]]:
+    # identical calls (same function, same arguments) share one key and run once
+    function_name = tool_call.function.name
+    try:
+        function_args = json.loads(tool_call.function.arguments or "{}")
+    except json.JSONDecodeError:
+        return (function_name, tool_call.function.arguments or ""), None
+    return (function_name, json.dumps(function_args, sort_keys=True)), function_args
+
+
+async def arun(function_name: str, function_args: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        result = _args_error(function_name, function_args)
+        if result is not None:
+            return result
+        if function_name == "validate_vin":
+            return await avalidate_vin(function_args["vin"])
+        if function_name == "validate_vehicle_info":
+            return await avalidate_vehicle_info(function_args["year"], function_args["make"], function_args["body_type"])
+        if function_name == "get_inspirational_quote":
+            return quote_pool.get_quote()
+        return _error(function_name, "unknown tool")
+    except Exception as e:
+        print(e)
+        return _error(function_name, str(e))
+
+
+def _unique_calls(tool_calls: List) -> Tuple[Dict[Tuple[str, str], Optional[Dict[str, Any]]], Dict[str, Tuple[str, str]]]:
+    calls = {}
+    keys = {}
+    for tool_call in tool_calls:
+        key, function_args = _parse(tool_call)
+        calls.setdefault(key, function_args)
+        keys[tool_call.id] = key
+    return calls, keys
+
+
+def _by_tool_call_id(keys: Dict[str, Tuple[str, str]], results: Dict[Tuple[str, str], Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {tool_call_id: results[key] for tool_call_id, key in keys.items()}
+
+
+async def aexecute_all(tool_calls: List, deadline: float = TOOL_DEADLINE_SECONDS) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs a completion's tool calls concurrently, identical calls once, all under one deadline.
+    Returns a result for every tool_call_id; calls that miss the deadline or cannot be parsed get an error result.
+    """
+    calls, keys = _unique_calls(tool_calls)
+    results = {}
+    tasks = {}
+    for key, function_args in calls.items():
+        if function_args is None:
+            results[key] = _error(key[0], "arguments are not valid JSON")
+        else:
+            tasks[asyncio.ensure_future(arun(key[0], function_args))] = key
+
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        for task, key in tasks.items():
+            results[key] = task.result() if task in done else _error(key[0], "timed out")
+    return _by_tool_call_id(keys, results)
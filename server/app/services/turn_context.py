@@ -0,0 +1,93 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import CONTEXT_MAX_MESSAGES
+from app.enums.sender import Sender
+from app.models.message import Message
+from app.models.session import Session as SessionModel
+from app.models.vehicle import Vehicle
+from app.schemas.message import MessageResponse
+
+
+@dataclass
+class TurnContext:
+    """Everything a bot turn reads, loaded once. Routing, the prompt and the summaries work from it, not the db."""
+    session: SessionModel
+    vehicles: List[Vehicle]   # oldest first
+    messages: List[Message]   # recent window, oldest first
+    added: List[Any] = field(default_factory=list)   # new rows, stored when the turn commits
+    session_changes: Dict[str, Any] = field(default_factory=dict)   # for session_service.update
+    vehicle_changes: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    user_message: Optional[MessageResponse] = None   # the user message the turn stored, once committed
+
+    @property
+    def session_id(self) -> int:
+        return self.session.session_id
+
+    @property
+    def user_text(self) -> Optional[str]:
+        # the answer this turn handles; None when the bot spoke last
+        if self.messages and self.messages[-1].sender == Sender.user:
+            return self.messages[-1].content
+        return None
+
+    def vehicle(self) -> Vehicle:
+        if not self.vehicles:
+            return self.new_vehicle()
+        return self.vehicles[-1]
+
+    def new_vehicle(self) -> Vehicle:
+        vehicle = Vehicle(session_id=self.session_id)
+        self.vehicles.append(vehicle)
+        self.added.append(vehicle)
+        return vehicle
+
+    def set_session(self, attribute: str, value: Any):
+        # visible to the rest of the turn now, written by the turn's batched update
+        set_committed_value(self.session, attribute, value)
+        self.session_changes[attribute] = value
+
+    def set_vehicle(self, vehicle: Vehicle, attribute: str, value: Any):
+        if any(row is vehicle for row in self.added):
+            # inserted with the turn, values and all
+            setattr(vehicle, attribute, value)
+            return
+        set_committed_value(vehicle, attribute, value)
+        self.vehicle_changes.setdefault(vehicle.vehicle_id, {})[attribute] = value
+
+    def add_user_message(self, content: str, idempotency_key: Optional[str] = None):
+        # stored by the turn's commit, together with the reply
+        message = Message(session_id=self.session_id, sender=Sender.user, content=content, idempotency_key=idempotency_key)
+        self.added.append(message)
+        self.messages = (self.messages + [message])[-CONTEXT_MAX_MESSAGES:]
+
+    def bot_message_since(self, since: int) -> Optional[MessageResponse]:
+        # a bot message newer than the turn's start means another request already ran this turn
+        for message in self.messages:
+            if message.sender == Sender.bot and message.message_id > since:
+                return MessageResponse.model_validate(message)
+        return None
+
+
+def load(session_id: int, db: Session) -> Optional[TurnContext]:
+    """Two queries: the session joined with its vehicles, and the last CONTEXT_MAX_MESSAGES messages."""
+    session = (
+        db.query(SessionModel)
+        .options(joinedload(SessionModel.vehicles))
+        .filter(SessionModel.session_id == session_id)
+        .populate_existing()
+        .first()
+    )
+    if not session:
+        return None
+    messages = (
+        db.query(Message)
+        .filter(Message.session_id == session_id)
+        .order_by(Message.message_id.desc())
+        .limit(CONTEXT_MAX_MESSAGES)
+        .all()
+    )
+    return TurnContext(session=session, vehicles=list(session.vehicles), messages=list(reversed(messages)))
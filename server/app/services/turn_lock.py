@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import or_, select, update
+
+from app.config import TURN_LOCK_TIMEOUT_SECONDS
+from app.db.database import async_engine
+from app.models.session import Session as SessionModel
+
+# how often a turn waiting on another worker's lease looks again
+LEASE_POLL_SECONDS = 0.1
+
+_sessions = SessionModel.__table__
+
+_in_flight: Dict[int, asyncio.Future] = {}
+_lock = threading.Lock()
+_stats = {"turns": 0, "coalesced_process": 0, "coalesced_database": 0}
+
+
+class Flight:
+    """leader runs the turn and sets result; followers only read the leader's result."""
+
+    def __init__(self, leader: bool, result: Any = None):
+        self.leader = leader
+        self.result = result
+
+
+def _count(key: str):
+    with _lock:
+        _stats[key] += 1
+
+
+async def _take_lease(session_id: int, until: datetime) -> bool:
+    """
+    True once the session's lease is ours until `until`, or when there is no such session (the turn
+    then finds nothing to run). One short transaction: no connection is held while the turn runs.
+    """
+    async with async_engine.begin() as conn:
+        taken = await conn.execute(
+            update(_sessions)
+            .where(
+                _sessions.c.session_id == session_id,
+                or_(_sessions.c.turn_lease_until.is_(None), _sessions.c.turn_lease_until < datetime.now(timezone.utc))
+            )
+            .values(turn_lease_until=until)
+        )
+        if taken.rowcount:
+            return True
+        exists = await conn.execute(select(_sessions.c.session_id).where(_sessions.c.session_id == session_id))
+        return exists.first() is None
+
+
+async def _release_lease(session_id: int, until: datetime):
+    # only our own lease: once it expired another worker may hold a newer one
+    async with async_engine.begin() as conn:
+        await conn.execute(
+            update(_sessions)
+            .where(_sessions.c.session_id == session_id, _sessions.c.turn_lease_until == until)
+            .values(turn_lease_until=None)
+        )
+
+
+@asynccontextmanager
+async def _database_lock(session_id: int) -> AsyncIterator[None]:
+    # serializes turns across workers with a lease on the session row rather than a lock that pins a
+    # pooled connection for the whole LLM call. a worker that dies mid-turn leaves a lease that expires
+    # after TURN_LOCK_TIMEOUT_SECONDS. other databases (sqlite in development) run a single worker
+    if async_engine.dialect.name != "postgresql":
+        yield
+        return
+    deadline = time.monotonic() + TURN_LOCK_TIMEOUT_SECONDS
+    while True:
+        until = datetime.now(timezone.utc) + timedelta(seconds=TURN_LOCK_TIMEOUT_SECONDS)
+        if await _take_lease(session_id, until):
+            break
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Timed out waiting for the bot turn in flight on session {session_id}.")
+        await asyncio.sleep(LEASE_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        # also when the turn was cancelled, so the next one doesn't wait for the lease to expire
+        await asyncio.shield(_release_lease(session_id, until))
+
+
+@asynccontextmanager
+async def single_flight(session_id: int, completed: Callable[[], Awaitable[Optional[Any]]], share: bool = True) -> AsyncIterator[Flight]:
+    """
+    One bot turn per session at a time. A caller arriving while a turn is in flight in this process
+    waits for it and gets its result. Across workers a lease on the session row serializes the turns,
+    and once it is held completed() returns the reply another worker produced meanwhile (None to run the turn).
+    Without share the caller brings its own user message, so it waits for the turn in flight and then
+    runs its own instead of taking that turn's result.
+    """
+    while True:
+        future = _in_flight.get(session_id)
+        if future is None:
+            break
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # the leader's request went away (a closed stream); take over unless we were cancelled ourselves
+            if future.cancelled():
+                continue
+            raise
+        except Exception:
+            if share:
+                raise
+            continue
+        if result is not None and share:
+            _count("coalesced_process")
+            yield Flight(leader=False, result=result)
+            return
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[session_id] = future
+    flight = Flight(leader=True)
+    try:
+        async with _database_lock(session_id):
+            result = await completed()
+            if result is not None:
+                _count("coalesced_database")
+                flight = Flight(leader=False, result=result)
+            else:
+                _count("turns")
+            yield flight
+        future.set_result(flight.result)
+    except (asyncio.CancelledError, GeneratorExit):
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # followers may not exist; keeps asyncio from logging an unretrieved exception
+        future.exception()
+        raise
+    finally:
+        if not future.done():
+            future.cancel()
+        _in_flight.pop(session_id, None)
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
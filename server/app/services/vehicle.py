@@ -1,16 +1,34 @@
-from typing import Any
+from typing import Any, Dict, Optional
+from sqlalchemy import update as sa_update
 from sqlalchemy.orm import Session
 from app.enums.license_status import LicenseStatus
 from app.enums.license_type import LicenseType
 from app.enums.vehicle_use import VehicleUse
 from app.models.vehicle import Vehicle
+from app.services import session_summary
 
-def create_vehicle(db: Session, session_id: int):
-    vehicle = Vehicle(session_id=session_id)
-    db.add(vehicle)
-    db.commit()
-    db.refresh(vehicle)
+def checked_changes(model, changes: Dict[str, Any]) -> Dict[str, Any]:
+    # only the model's own columns, never its primary key
+    columns = {column.name for column in model.__table__.columns if not column.primary_key}
+    unknown = [attribute for attribute in changes if attribute not in columns]
+    if unknown:
+        raise ValueError(f"Unknown {model.__tablename__} attribute(s): {', '.join(unknown)}")
+    return changes
 
+def update(
+    vehicle_id: int,
+    db: Session,
+    changes: Dict[str, Any],
+    session_id: Optional[int] = None,
+    commit: bool = True
+) -> Optional[Vehicle]:
+    """One UPDATE ... RETURNING for the vehicle (only if it belongs to session_id, when given); None if no row matched."""
+    statement = sa_update(Vehicle).where(Vehicle.vehicle_id == vehicle_id)
+    if session_id is not None:
+        statement = statement.where(Vehicle.session_id == session_id)
+    vehicle = db.execute(statement.values(**checked_changes(Vehicle, changes)).returning(Vehicle)).scalar_one_or_none()
+    if commit:
+        db.commit()
     return vehicle
 
 def save (
@@ -19,7 +37,7 @@ def save (
     attribute: str,
     value: Any
 ):
-    veh = db.query(Vehicle).filter(Vehicle.vehicle_id == vehicle_id).first()
-    setattr(veh, attribute, value)
+    vehicle = update(vehicle_id, db, {attribute: value}, commit=False)
+    if vehicle is not None:
+        session_summary.apply(vehicle.session_id, db, vehicle_changes={vehicle_id: {attribute: value}})
     db.commit()
-    db.refresh(veh)
\ No newline at end of file
@@ -0,0 +1,315 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import VIN_CACHE_NEGATIVE_TTL_SECONDS, VIN_CACHE_SIZE, VIN_CACHE_TTL_SECONDS, VIN_DECODE_CLAIM_SECONDS
+from app.db.database import SessionLocal
+from app.models.vin_decode import VinDecode
+from app.models.vin_decode_claim import VinDecodeClaim
+
+# how often a worker waiting on another worker's decode of the same vin looks again
+CLAIM_POLL_SECONDS = 0.1
+
+_claims = VinDecodeClaim.__table__
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, count: bool = True) -> Optional[Dict[str, Any]]:
+        # count=False for a second look after waiting on a lock, so a miss is only counted once
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_memory = LRUCache(VIN_CACHE_SIZE)
+_db_hits = 0
+_db_misses = 0
+
+# striped locks: one decode per vin at a time inside this process without an unbounded lock table
+_vin_locks = [threading.Lock() for _ in range(64)]
+# the same stripes for async callers, per event loop since an asyncio.Lock belongs to one
+_async_vin_locks: Dict[int, List[asyncio.Lock]] = {}
+
+
+def _ttl_seconds(valid: bool) -> int:
+    return VIN_CACHE_TTL_SECONDS if valid else VIN_CACHE_NEGATIVE_TTL_SECONDS
+
+
+def _as_utc(value: datetime) -> datetime:
+    # sqlite hands back naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _lock_for(vin: str) -> threading.Lock:
+    return _vin_locks[hash(vin) % len(_vin_locks)]
+
+
+def _async_lock_for(vin: str) -> asyncio.Lock:
+    loop_id = id(asyncio.get_running_loop())
+    locks = _async_vin_locks.get(loop_id)
+    if locks is None:
+        locks = _async_vin_locks[loop_id] = [asyncio.Lock() for _ in range(len(_vin_locks))]
+    return locks[hash(vin) % len(locks)]
+
+
+def stats() -> Dict[str, int]:
+    return {
+        "size": len(_memory),
+        "maxsize": _memory.maxsize,
+        "hits": _memory.hits,
+        "misses": _memory.misses,
+        "evictions": _memory.evictions,
+        "db_hits": _db_hits,
+        "db_misses": _db_misses,
+    }
+
+
+def _stored(vin: str, db: Session, count: bool = True) -> Optional[Dict[str, Any]]:
+    # a live vin_decodes row, also put in memory; None means decode it. count=False for a second look
+    global _db_hits, _db_misses
+
+    row = db.get(VinDecode, vin)
+    if row and _as_utc(row.expires_at) > datetime.now(timezone.utc):
+        if count:
+            _db_hits += 1
+        _memory.put(vin, row.result, _as_utc(row.expires_at).timestamp())
+        return row.result
+    if count:
+        _db_misses += 1
+    return None
+
+
+def _take_claim(vin: str, until: datetime, db: Session) -> bool:
+    # a new claim, or one whose worker let it expire; a live one held elsewhere is left alone
+    statement = pg_insert(_claims).values(vin=vin, claimed_until=until)
+    taken = db.execute(statement.on_conflict_do_update(
+        index_elements=[_claims.c.vin],
+        set_={"claimed_until": statement.excluded.claimed_until},
+        where=_claims.c.claimed_until < datetime.now(timezone.utc)
+    ))
+    return bool(taken.rowcount)
+
+
+def _look(vin: str, count: bool = True) -> Tuple[Optional[Dict[str, Any]], bool, Optional[datetime]]:
+    """
+    One short transaction, no connection kept: (stored result, False, None) for a live row, otherwise
+    whether this worker may decode the vin and, on postgres, its claim on doing so until the returned time.
+    A claim held by another worker gives (None, False, None): look again once it stored its result.
+    """
+    db = SessionLocal()
+    try:
+        cached = _stored(vin, db, count)
+        if cached is not None:
+            return cached, False, None
+        # serialize the first decode of a vin across workers; other databases (sqlite) run one worker
+        if db.bind.dialect.name != "postgresql":
+            return None, True, None
+        until = datetime.now(timezone.utc) + timedelta(seconds=VIN_DECODE_CLAIM_SECONDS)
+        if not _take_claim(vin, until, db):
+            return None, False, None
+        # the worker that held the claim may have stored its result just before letting go
+        cached = _stored(vin, db, count=False)
+        if cached is not None:
+            db.rollback()
+            return cached, False, None
+        db.commit()
+        return None, True, until
+    finally:
+        db.close()
+
+
+def _store(vin: str, result: Dict[str, Any]):
+    now = datetime.now(timezone.utc)
+    valid = bool(result.get("valid"))
+    expires_at = now + timedelta(seconds=_ttl_seconds(valid))
+    db = SessionLocal()
+    try:
+        db.merge(VinDecode(
+            vin=vin,
+            valid=valid,
+            result=result,
+            decoded_at=now,
+            expires_at=expires_at
+        ))
+        db.commit()
+    finally:
+        db.close()
+    _memory.put(vin, result, expires_at.timestamp())
+
+
+def _release_claim(vin: str, until: datetime):
+    # only our own claim: once it expired another worker may hold a newer one
+    db = SessionLocal()
+    try:
+        db.execute(delete(_claims).where(_claims.c.vin == vin, _claims.c.claimed_until == until))
+        db.commit()
+    except Exception as e:
+        print(f"VIN cache error releasing the claim on {vin}: {e}")
+    finally:
+        db.close()
+
+
+def get_or_decode(vin: str, decode: Callable[[str], Tuple[Dict[str, Any], bool]]) -> Dict[str, Any]:
+    """
+    Returns the cached decode for a vin, calling decode(vin) -> (result, cacheable) only when
+    neither the in-memory LRU nor the vin_decodes table has a live entry. No pooled connection is
+    held while decode runs: the vin is claimed in one short transaction and stored in another.
+    """
+    cached = _memory.get(vin)
+    if cached is not None:
+        return cached
+
+    with _lock_for(vin):
+        cached = _memory.get(vin, count=False)
+        if cached is not None:
+            return cached
+
+        result = None
+        until = None
+        try:
+            cached, claimed, until = _look(vin)
+            while cached is None and not claimed:
+                time.sleep(CLAIM_POLL_SECONDS)
+                cached, claimed, until = _look(vin, count=False)
+            if cached is not None:
+                return cached
+
+            result, cacheable = decode(vin)
+            if cacheable:
+                _store(vin, result)
+            return result
+        except Exception as e:
+            print(f"VIN cache error for {vin}: {e}")
+            if result is None:
+                result, _ = decode(vin)
+            return result
+        finally:
+            if until is not None:
+                _release_claim(vin, until)
+
+
+async def aget_or_decode(vin: str, decode: Callable[[str], Awaitable[Tuple[Dict[str, Any], bool]]]) -> Dict[str, Any]:
+    """
+    get_or_decode for async callers, with the same at-most-once decode: the memory tier inline, the
+    table and the claim in short transactions on worker threads, and decode awaited with neither held.
+    """
+    cached = _memory.get(vin)
+    if cached is not None:
+        return cached
+
+    async with _async_lock_for(vin):
+        cached = _memory.get(vin, count=False)
+        if cached is not None:
+            return cached
+
+        result = None
+        until = None
+        try:
+            cached, claimed, until = await asyncio.to_thread(_look, vin)
+            while cached is None and not claimed:
+                await asyncio.sleep(CLAIM_POLL_SECONDS)
+                cached, claimed, until = await asyncio.to_thread(_look, vin, False)
+            if cached is not None:
+                return cached
+
+            result, cacheable = await decode(vin)
+            if cacheable:
+                await asyncio.to_thread(_store, vin, result)
+            return result
+        except Exception as e:
+            print(f"VIN cache error for {vin}: {e}")
+            if result is None:
+                result, _ = await decode(vin)
+            return result
+        finally:
+            if until is not None:
+                # also when the decode was cancelled, so other workers don't wait for the claim to expire
+                await asyncio.shield(asyncio.to_thread(_release_claim, vin, until))
+
+
+def lookup_many(vins: List[str]) -> Dict[str, Dict[str, Any]]:
+    # memory first, then a single query for everything else
+    global _db_hits, _db_misses
+
+    found = {}
+    missing = []
+    for vin in vins:
+        cached = _memory.get(vin)
+        if cached is not None:
+            found[vin] = cached
+        else:
+            missing.append(vin)
+    if not missing:
+        return found
+
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        for row in db.query(VinDecode).filter(VinDecode.vin.in_(missing)).all():
+            if _as_utc(row.expires_at) > now:
+                found[row.vin] = row.result
+                _memory.put(row.vin, row.result, _as_utc(row.expires_at).timestamp())
+    except Exception as e:
+        print(f"VIN cache error: {e}")
+    finally:
+        db.close()
+
+    db_hits = sum(1 for vin in missing if vin in found)
+    _db_hits += db_hits
+    _db_misses += len(missing) - db_hits
+    return found
+
+
+def store_many(results: Dict[str, Dict[str, Any]]):
+    if not results:
+        return
+
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        for vin, result in results.items():
+            valid = bool(result.get("valid"))
+            expires_at = now + timedelta(seconds=_ttl_seconds(valid))
+            db.merge(VinDecode(vin=vin, valid=valid, result=result, decoded_at=now, expires_at=expires_at))
+            _memory.put(vin, result, expires_at.timestamp())
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"VIN cache error: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,96 @@
+from datetime import date
+from typing import Dict, Optional
+
+from app.services.wmi import WMI_MANUFACTURERS
+
+# ISO 3779 / 49 CFR 565 transliteration. I, O and Q are never used in a vin.
+TRANSLITERATION = {
+    **{str(d): d for d in range(10)},
+    "A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 6, "G": 7, "H": 8,
+    "J": 1, "K": 2, "L": 3, "M": 4, "N": 5, "P": 7, "R": 9,
+    "S": 2, "T": 3, "U": 4, "V": 5, "W": 6, "X": 7, "Y": 8, "Z": 9,
+}
+WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# position 10 repeats every 30 years; 0, U and Z are not valid year codes
+YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+
+# only north american vins (wmi starting 1-5) are required to carry a check digit
+CHECK_DIGIT_REGIONS = "12345"
+
+
+def compute_check_digit(vin: str) -> Optional[str]:
+    total = 0
+    for ch, weight in zip(vin, WEIGHTS):
+        value = TRANSLITERATION.get(ch)
+        if value is None:
+            return None
+        total += value * weight
+    remainder = total % 11
+    return "X" if remainder == 10 else str(remainder)
+
+
+def decode_model_year(vin: str) -> Optional[int]:
+    index = YEAR_CODES.find(vin[9])
+    if index < 0:
+        return None
+
+    # position 7 picks the cycle for passenger vehicles built for the us market (49 CFR 565.15):
+    # a digit for 1980-2009, a letter for 2010-2039
+    year = (1980 if vin[6].isdigit() else 2010) + index
+
+    # trucks and motorcycles don't use that flag, so a letter there can land on a model year
+    # that hasn't started yet; the earlier cycle is the only one it can be
+    if year > date.today().year + 1:
+        year -= 30
+    return year
+
+
+def lookup_manufacturer(vin: str) -> Optional[str]:
+    return WMI_MANUFACTURERS.get(vin[:3])
+
+
+def check_vin(vin: str) -> Dict[str, any]:
+    """
+    Structural vin validation with no network: characters, check digit, wmi and model year.
+    Returns the same {"valid", "error"} shape as vin_validator, plus whatever could be decoded locally.
+    """
+    vin = vin.strip().upper()
+
+    if len(vin) != 17:
+        return {
+            "valid": False,
+            "error": "VIN must be exactly 17 characters."
+        }
+
+    bad_chars = sorted({ch for ch in vin if ch not in TRANSLITERATION})
+    if bad_chars:
+        if any(ch in "IOQ" for ch in bad_chars):
+            error = "VIN cannot contain the letters I, O or Q. Please double-check the VIN (these are often 1 or 0)."
+        else:
+            error = "VIN can only contain letters and numbers."
+        return {
+            "valid": False,
+            "error": error
+        }
+
+    north_american = vin[0] in CHECK_DIGIT_REGIONS
+    check_digit = compute_check_digit(vin)
+    check_digit_ok = check_digit == vin[8]
+    if north_american and not check_digit_ok:
+        return {
+            "valid": False,
+            "error": "VIN invalid. The check digit (9th character) does not match. Please double-check the VIN for typos."
+        }
+
+    # an unreadable year code leaves the year unknown; the check digit already vouched for the vin
+    year = decode_model_year(vin)
+
+    return {
+        "valid": True,
+        "vin": vin,
+        "wmi": vin[:3],
+        "make": lookup_manufacturer(vin),
+        "year": str(year) if year else None,
+        "check_digit_verified": check_digit_ok
+    }
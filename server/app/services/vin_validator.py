@@ -1,29 +1,27 @@
-import requests
-from typing import Dict, Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.config import VPIC_MODE
+from app.services import http_client, makes_index, vin_cache, vin_check, vpic_store
+
+VIN_INVALID_ERROR = "VIN invalid."
+VPIC_BATCH_SIZE = 50 # DecodeVINValuesBatch limit
 
 def validate_vehicle_info(year: int, make: str, body_type: str) -> Dict[str, any]:
+    if VPIC_MODE == "offline":
+        return _validate_vehicle_info_offline(year, make, body_type)
+
     try:
-        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/GetAllMakes?format=json"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code != 200:
+        if not makes_index.ensure_loaded():
             return {
                 "valid": False,
                 "error": "Unable to validate."
             }
         
-        data = response.json()
-        makes = data.get("Results", [])
-        
-        make_found = None
-        make_id = None
-        for m in makes:
-            if m.get("Make_Name", "").lower() == make.lower():
-                make_found = m.get("Make_Name")
-                make_id = m.get("Make_ID")
-                break
-        
-        if not make_found:
+        # O(1) lookup against the process-wide index instead of scanning GetAllMakes
+        match = makes_index.lookup(make)
+        if not match:
             return {
                 "valid": False,
                 "error": f"Make '{make}' not found in NHTSA database. Please check the spelling and try again."
@@ -37,7 +35,7 @@ def validate_vehicle_info(year: int, make: str, body_type: str) -> Dict[str, any
         
         return {
             "valid": True,
-            "make": make_found,
+            "make": match[1],
             "body_type": body_type.strip(),
             "year": str(year)
         }
@@ -51,61 +49,172 @@ def validate_vehicle_info(year: int, make: str, body_type: str) -> Dict[str, any
             "error": f"Unable to validate vehicle information at this time. Please try again later. Error: {str(e)}"
         }
 
+def _validate_vehicle_info_offline(year: int, make: str, body_type: str) -> Dict[str, any]:
+    # make + year + body combination against the local vPIC snapshot
+    if not vpic_store.is_available():
+        return {
+            "valid": False,
+            "error": "Unable to validate."
+        }
+
+    match = vpic_store.lookup_make(make)
+    if not match:
+        return {
+            "valid": False,
+            "error": f"Make '{make}' not found in NHTSA database. Please check the spelling and try again."
+        }
+
+    if not body_type or not body_type.strip():
+        return {
+            "valid": False,
+            "error": "Body type is required."
+        }
+
+    try:
+        year = int(year)
+    except (TypeError, ValueError):
+        return {
+            "valid": False,
+            "error": "Year must be a number."
+        }
+
+    combination = vpic_store.validate_combination(match[0], year, body_type)
+    if not combination.get("valid"):
+        return combination
+
+    return {
+        "valid": True,
+        "make": match[1],
+        "body_type": combination["body_type"],
+        "year": str(year)
+    }
+
 def validate_vin(vin: str) -> Dict[str, any]:
     vin = vin.strip().upper()
 
-    if len(vin) != 17: # check length of vin
+    # reject typos (length, I/O/Q, check digit, year code) locally before any round trip
+    local = vin_check.check_vin(vin)
+    if not local.get("valid"):
+        return local
+
+    if VPIC_MODE == "offline":
+        return _validate_vin_offline(local)
+
+    # decoded against NHTSA at most once per vin; see vin_cache
+    result = vin_cache.get_or_decode(vin, _decode_vin)
+    return _with_local_fallback(result, local)
+
+def _validate_vin_offline(local: Dict[str, any]) -> Dict[str, any]:
+    make = local.get("make") or vpic_store.lookup_wmi(local["wmi"])
+    if not make:
+        # an unknown wmi only means "invalid" when the snapshot actually carries wmis
         return {
             "valid": False,
-            "error": f"VIN must be exactly 17 characters."
+            "error": VIN_INVALID_ERROR if vpic_store.has_wmis() else "Unable to validate VIN."
+        }
+
+    return {
+        "valid": True,
+        "make": make,
+        "body_type": "Unknown",
+        "year": local.get("year") or "Unknown"
+    }
+
+def _with_local_fallback(result: Dict[str, any], local: Dict[str, any]) -> Dict[str, any]:
+    if result.get("valid"):
+        if result.get("year") in (None, "", "Unknown") and local.get("year"):
+            result = {**result, "year": local["year"]}
+        return result
+
+    # vPIC unavailable: fall back to what the vin itself tells us
+    if result.get("error") != VIN_INVALID_ERROR and local.get("make") and local.get("year"):
+        return {
+            "valid": True,
+            "make": local["make"],
+            "body_type": "Unknown",
+            "year": local["year"]
         }
 
+    return result
+
+def validate_vins(vins: List[str]) -> Dict[str, Dict[str, any]]:
+    """
+    Batch variant of validate_vin for fleet imports: local checks, one cache pass, then
+    DecodeVINValuesBatch in chunks of VPIC_BATCH_SIZE run concurrently. Keyed by normalized vin.
+    """
+    results = {}
+    local_checks = {}
+    for vin in vins:
+        vin = vin.strip().upper()
+        local = vin_check.check_vin(vin)
+        if not local.get("valid"):
+            results[vin] = local
+        elif VPIC_MODE == "offline":
+            results[vin] = _validate_vin_offline(local)
+        else:
+            local_checks[vin] = local
+
+    cached = vin_cache.lookup_many(list(local_checks))
+    pending = [vin for vin in local_checks if vin not in cached]
+    chunks = [pending[i:i + VPIC_BATCH_SIZE] for i in range(0, len(pending), VPIC_BATCH_SIZE)]
+
+    decoded = {}
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 4)) as pool:
+            for chunk_results in pool.map(_decode_vin_batch, chunks):
+                decoded.update(chunk_results)
+
+    vin_cache.store_many({vin: result for vin, (result, cacheable) in decoded.items() if cacheable})
+
+    for vin, local in local_checks.items():
+        result = cached.get(vin) or decoded[vin][0]
+        results[vin] = _with_local_fallback(result, local)
+    return results
+
+def _decode_vin_batch(vins: List[str]) -> Dict[str, Tuple[Dict[str, any], bool]]:
     try:
-        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVin/{vin}?format=json"
-        response = requests.get(url, timeout=5)
-        
+        response = http_client.post(
+            "https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVINValuesBatch/",
+            data={"format": "json", "data": ";".join(vins)},
+            timeout=15
+        )
         if response.status_code != 200:
-            return {
-                "valid": False,
-                "error": "Unable to validate VIN."
-            }
-        
-        data = response.json()
-        results = data.get("Results", [])
-        
-        if not results:
-            return {
-                "valid": False,
-                "error": "VIN invalid."
-            }
-        
-        make = None
-        body_type = None
-        year = None
-        
-        for result in results:
-            variable = result.get("Variable")
-            value = result.get("Value")
-            
-            if variable == "Make":
-                make = value
-            elif variable == "Body Class":
-                body_type = value
-            elif variable == "Model Year":
-                year = value
-        
-        if not make or make == "NULL":
-            return {
-                "valid": False,
-                "error": "VIN invalid."
-            }
-        
-        return {
+            raise http_client.UpstreamError(f"vPIC batch decode returned {response.status_code}")
+        rows = {(row.get("VIN") or "").strip().upper(): row for row in response.json().get("Results", [])}
+    except Exception as e:
+        print(f"Unable to batch decode VINs: {e}")
+        failure = {
+            "valid": False,
+            "error": "Unable to validate VIN at this time. Please try again later."
+        }
+        return {vin: (failure, False) for vin in vins}
+
+    decoded = {}
+    for vin in vins:
+        row = rows.get(vin)
+        make = row.get("Make") if row else None
+        if not make:
+            decoded[vin] = ({"valid": False, "error": VIN_INVALID_ERROR}, True)
+            continue
+        decoded[vin] = ({
             "valid": True,
             "make": make,
-            "body_type": body_type or "Unknown",
-            "year": year or "Unknown"
-        }
+            "body_type": row.get("BodyClass") or "Unknown",
+            "year": row.get("ModelYear") or "Unknown"
+        }, True)
+    return decoded
+
+def _decode_vin(vin: str) -> Tuple[Dict[str, any], bool]:
+    # returns (result, cacheable). transient failures are never cached as "VIN invalid"
+    try:
+        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVin/{vin}?format=json"
+        response = http_client.get(url)
+        return _parse_decode_response(response)
+    except http_client.UpstreamError as e:
+        return {
+            "valid": False,
+            "error": "Unable to validate VIN at this time. Please try again later."
+        }, False
     except Exception as e:
         pass
         import traceback
@@ -113,5 +222,84 @@ def validate_vin(vin: str) -> Dict[str, any]:
         return {
             "valid": False,
             "error": f"Unable to validate VIN at this time. Please try again later. Error: {str(e)}"
-        }
+        }, False
+
+async def _adecode_vin(vin: str) -> Tuple[Dict[str, any], bool]:
+    try:
+        url = f"https://vpic.nhtsa.dot.gov/api/vehicles/DecodeVin/{vin}?format=json"
+        response = await http_client.aget(url)
+        return _parse_decode_response(response)
+    except http_client.UpstreamError as e:
+        return {
+            "valid": False,
+            "error": "Unable to validate VIN at this time. Please try again later."
+        }, False
+    except Exception as e:
+        return {
+            "valid": False,
+            "error": f"Unable to validate VIN at this time. Please try again later. Error: {str(e)}"
+        }, False
+
+def _parse_decode_response(response) -> Tuple[Dict[str, any], bool]:
+    if response.status_code != 200:
+        return {
+            "valid": False,
+            "error": "Unable to validate VIN."
+        }, False
+    
+    data = response.json()
+    results = data.get("Results", [])
+    
+    if not results:
+        return {
+            "valid": False,
+            "error": VIN_INVALID_ERROR
+        }, True
+    
+    make = None
+    body_type = None
+    year = None
+    
+    for result in results:
+        variable = result.get("Variable")
+        value = result.get("Value")
+        
+        if variable == "Make":
+            make = value
+        elif variable == "Body Class":
+            body_type = value
+        elif variable == "Model Year":
+            year = value
+    
+    if not make or make == "NULL":
+        return {
+            "valid": False,
+            "error": VIN_INVALID_ERROR
+        }, True
+    
+    return {
+        "valid": True,
+        "make": make,
+        "body_type": body_type or "Unknown",
+        "year": year or "Unknown"
+    }, True
+
+async def avalidate_vin(vin: str) -> Dict[str, any]:
+    # asyncio twin of validate_vin for the async request path
+    vin = vin.strip().upper()
+
+    local = vin_check.check_vin(vin)
+    if not local.get("valid"):
+        return local
+
+    if VPIC_MODE == "offline":
+        return _validate_vin_offline(local)
+
+    result = await vin_cache.aget_or_decode(vin, _adecode_vin)
+    return _with_local_fallback(result, local)
 
+async def avalidate_vehicle_info(year: int, make: str, body_type: str) -> Dict[str, any]:
+    # in-memory / local sqlite lookups; only a cold makes index has to reach the network
+    if VPIC_MODE != "offline" and not makes_index.is_loaded():
+        return await asyncio.to_thread(validate_vehicle_info, year, make, body_type)
+    return validate_vehicle_info(year, make, body_type)
@@ -0,0 +1,224 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import VPIC_STORE_PATH
+from app.services.makes_index import normalize_make
+
+SCHEMA = """
+CREATE TABLE makes (
+    make_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    norm TEXT NOT NULL
+);
+CREATE UNIQUE INDEX ix_makes_norm ON makes (norm);
+
+CREATE TABLE models (
+    model_id INTEGER PRIMARY KEY,
+    make_id INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX ix_models_make ON models (make_id);
+
+CREATE TABLE body_classes (
+    make_id INTEGER NOT NULL,
+    body_class TEXT NOT NULL,
+    year_from INTEGER,
+    year_to INTEGER
+);
+CREATE INDEX ix_body_classes_make ON body_classes (make_id);
+
+CREATE TABLE wmis (
+    wmi TEXT PRIMARY KEY,
+    make_id INTEGER NOT NULL
+);
+"""
+
+# what users type -> words that appear in vPIC body class names
+BODY_SYNONYMS = {
+    "suv": ("sport utility", "suv", "multi-purpose"),
+    "crossover": ("sport utility", "suv", "crossover"),
+    "truck": ("pickup", "truck"),
+    "pickup": ("pickup",),
+    "sedan": ("sedan", "saloon"),
+    "coupe": ("coupe",),
+    "hatchback": ("hatchback", "liftback"),
+    "wagon": ("wagon",),
+    "van": ("van",),
+    "minivan": ("minivan",),
+    "convertible": ("convertible", "cabriolet"),
+    "motorcycle": ("motorcycle",),
+}
+
+_local = threading.local()
+
+
+def _records(path: Path) -> List[Dict]:
+    # accepts either a bare json array or a vPIC api envelope ({"Results": [...]})
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("Results", []) if isinstance(data, dict) else data
+
+
+def load_dump(dump_dir: Path, store_path: Path = VPIC_STORE_PATH) -> Dict[str, int]:
+    """
+    Builds a fresh store from a vPIC dump directory and swaps it in atomically.
+    Expected files (vPIC field names): makes.json (Make_ID, Make_Name), and optionally
+    models.json (Model_ID, Make_ID, Model_Name), body_classes.json (Make_ID, Body_Class, Year_From, Year_To)
+    and wmis.json (WMI, Make_ID).
+    """
+    dump_dir = Path(dump_dir)
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = store_path.with_suffix(store_path.suffix + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    counts = {}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+
+        makes = {}
+        for row in _records(dump_dir / "makes.json"):
+            name = (row.get("Make_Name") or "").strip()
+            norm = normalize_make(name)
+            if norm and norm not in makes:
+                makes[norm] = (int(row["Make_ID"]), name, norm)
+        conn.executemany("INSERT INTO makes VALUES (?, ?, ?)", makes.values())
+        counts["makes"] = len(makes)
+
+        optional_tables = {
+            "models": ("INSERT OR IGNORE INTO models VALUES (?, ?, ?)",
+                       lambda r: (int(r["Model_ID"]), int(r["Make_ID"]), r["Model_Name"].strip())),
+            "body_classes": ("INSERT INTO body_classes VALUES (?, ?, ?, ?)",
+                             lambda r: (int(r["Make_ID"]), r["Body_Class"].strip(), r.get("Year_From"), r.get("Year_To"))),
+            "wmis": ("INSERT OR REPLACE INTO wmis VALUES (?, ?)",
+                     lambda r: (r["WMI"].strip().upper(), int(r["Make_ID"]))),
+        }
+        for table, (sql, to_row) in optional_tables.items():
+            path = dump_dir / f"{table}.json"
+            rows = [to_row(r) for r in _records(path)] if path.exists() else []
+            conn.executemany(sql, rows)
+            counts[table] = len(rows)
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, store_path)
+    close()
+    return counts
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    # one read-only connection per thread, reopened when a refresh swaps the file
+    try:
+        mtime = os.stat(VPIC_STORE_PATH).st_mtime
+    except OSError:
+        close()
+        return None
+
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "mtime", None) == mtime:
+        return conn
+    close()
+    conn = sqlite3.connect(f"file:{VPIC_STORE_PATH}?mode=ro", uri=True, check_same_thread=False)
+    _local.conn = conn
+    _local.mtime = mtime
+    return conn
+
+
+def close():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def is_available() -> bool:
+    return _connect() is not None
+
+
+def lookup_make(make: str) -> Optional[Tuple[int, str]]:
+    conn = _connect()
+    if conn is None:
+        return None
+    row = conn.execute("SELECT make_id, name FROM makes WHERE norm = ?", (normalize_make(make),)).fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def lookup_wmi(wmi: str) -> Optional[str]:
+    conn = _connect()
+    if conn is None:
+        return None
+    row = conn.execute(
+        "SELECT makes.name FROM wmis JOIN makes ON makes.make_id = wmis.make_id WHERE wmis.wmi = ?",
+        (wmi.upper(),)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def has_wmis() -> bool:
+    conn = _connect()
+    return conn is not None and conn.execute("SELECT 1 FROM wmis LIMIT 1").fetchone() is not None
+
+
+def body_classes(make_id: int) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    conn = _connect()
+    if conn is None:
+        return []
+    return conn.execute(
+        "SELECT body_class, year_from, year_to FROM body_classes WHERE make_id = ?", (make_id,)
+    ).fetchall()
+
+
+def _body_matches(body_type: str, body_class: str) -> bool:
+    body_words = re.findall(r"[a-z]+", body_type.lower())
+    body_class = body_class.lower()
+    for word in body_words:
+        for needle in BODY_SYNONYMS.get(word, (word,)):
+            if needle in body_class:
+                return True
+    return False
+
+
+def validate_combination(make_id: int, year: int, body_type: str) -> Dict[str, any]:
+    """
+    Checks year and body type against the make's body classes. Makes without body class data
+    in the dump are accepted, which is what the online validator does for every make.
+    """
+    classes = body_classes(make_id)
+    if not classes:
+        return {"valid": True, "body_type": body_type.strip()}
+
+    in_years = [c for c in classes if (c[1] is None or c[1] <= year) and (c[2] is None or year <= c[2])]
+    if not in_years:
+        first = min((c[1] for c in classes if c[1] is not None), default=None)
+        last = None if any(c[2] is None for c in classes) else max(c[2] for c in classes)
+        span = f" NHTSA lists this make from {first} to {last or 'present'}." if first else ""
+        return {
+            "valid": False,
+            "error": f"No vehicles found for this make in {year}.{span}"
+        }
+
+    for body_class, _, _ in in_years:
+        if _body_matches(body_type, body_class):
+            return {"valid": True, "body_type": body_class}
+
+    options = ", ".join(sorted({c[0] for c in in_years})[:8])
+    return {
+        "valid": False,
+        "error": f"Body type '{body_type}' does not match any {year} vehicle for this make. Options include: {options}."
+    }
+
+
+def iter_make_names() -> Iterable[str]:
+    conn = _connect()
+    if conn is None:
+        return []
+    return (row[0] for row in conn.execute("SELECT name FROM makes"))
@@ -0,0 +1,58 @@
+# bundled world manufacturer identifier (vin positions 1-3) -> make, named the way vPIC names makes.
+# not exhaustive; vin_check falls back to vPIC for anything missing here.
+WMI_MANUFACTURERS = {
+    # united states
+    "1B3": "DODGE", "1B4": "DODGE", "1B7": "DODGE", "1C3": "CHRYSLER", "1C4": "CHRYSLER",
+    "1C6": "RAM", "1D3": "DODGE", "1D4": "DODGE", "1D7": "DODGE",
+    "1FA": "FORD", "1FB": "FORD", "1FC": "FORD", "1FD": "FORD", "1FM": "FORD", "1FT": "FORD",
+    "1FU": "FREIGHTLINER", "1FV": "FREIGHTLINER", "1F9": "FORD",
+    "1G1": "CHEVROLET", "1G2": "PONTIAC", "1G3": "OLDSMOBILE", "1G4": "BUICK", "1G6": "CADILLAC",
+    "1G8": "SATURN", "1GB": "CHEVROLET", "1GC": "CHEVROLET", "1GD": "GMC", "1GK": "GMC",
+    "1GM": "PONTIAC", "1GN": "CHEVROLET", "1GT": "GMC", "1GY": "CADILLAC",
+    "1HD": "HARLEY-DAVIDSON", "1HG": "HONDA", "1HT": "INTERNATIONAL",
+    "1J4": "JEEP", "1J8": "JEEP", "1L1": "LINCOLN", "1LN": "LINCOLN", "1ME": "MERCURY",
+    "1M1": "MACK", "1M2": "MACK", "1N4": "NISSAN", "1N6": "NISSAN", "1NX": "TOYOTA",
+    "1VW": "VOLKSWAGEN", "1XK": "KENWORTH", "1XP": "PETERBILT", "1YV": "MAZDA", "1ZV": "FORD",
+    "2C3": "CHRYSLER", "2C4": "CHRYSLER", "2D3": "DODGE", "2FA": "FORD", "2FM": "FORD",
+    "2FT": "FORD", "2G1": "CHEVROLET", "2G2": "PONTIAC", "2G4": "BUICK", "2GT": "GMC",
+    "2HG": "HONDA", "2HJ": "HONDA", "2HK": "HONDA", "2HM": "HYUNDAI", "2LM": "LINCOLN",
+    "2T1": "TOYOTA", "2T2": "LEXUS", "2T3": "TOYOTA",
+    "3C4": "CHRYSLER", "3C6": "RAM", "3D3": "DODGE", "3D7": "DODGE", "3FA": "FORD",
+    "3FE": "FORD", "3G1": "CHEVROLET", "3GN": "CHEVROLET", "3GC": "CHEVROLET", "3GT": "GMC",
+    "3HG": "HONDA", "3KP": "KIA", "3LN": "LINCOLN", "3MZ": "MAZDA", "3N1": "NISSAN",
+    "3N6": "NISSAN", "3TM": "TOYOTA", "3VW": "VOLKSWAGEN",
+    "4JG": "MERCEDES-BENZ", "4S3": "SUBARU", "4S4": "SUBARU", "4T1": "TOYOTA", "4T3": "TOYOTA",
+    "4T4": "TOYOTA", "4US": "BMW", "4V4": "VOLVO",
+    "5FN": "HONDA", "5J6": "HONDA", "5J8": "ACURA", "5L1": "LINCOLN", "5LM": "LINCOLN",
+    "5N1": "NISSAN", "5NM": "HYUNDAI", "5NP": "HYUNDAI", "5TD": "TOYOTA", "5TF": "TOYOTA",
+    "5UX": "BMW", "5XX": "KIA", "5XY": "KIA", "5YJ": "TESLA", "7SA": "TESLA",
+    "7FA": "HONDA",
+    # japan
+    "JA3": "MITSUBISHI", "JA4": "MITSUBISHI", "JF1": "SUBARU", "JF2": "SUBARU",
+    "JH4": "ACURA", "JHM": "HONDA", "JHL": "HONDA", "JM1": "MAZDA", "JM3": "MAZDA",
+    "JN1": "NISSAN", "JN8": "NISSAN", "JNK": "INFINITI", "JNR": "INFINITI",
+    "JS1": "SUZUKI", "JS2": "SUZUKI", "JS3": "SUZUKI", "JT2": "TOYOTA", "JT3": "TOYOTA",
+    "JT4": "TOYOTA", "JTD": "TOYOTA", "JTE": "TOYOTA", "JTH": "LEXUS", "JTJ": "LEXUS",
+    "JTK": "SCION", "JTL": "SCION", "JTM": "TOYOTA", "JTN": "TOYOTA", "JYA": "YAMAHA",
+    "JKA": "KAWASAKI",
+    # korea
+    "KL1": "CHEVROLET", "KM8": "HYUNDAI", "KMH": "HYUNDAI", "KNA": "KIA", "KNB": "KIA",
+    "KNC": "KIA", "KND": "KIA", "KNM": "RENAULT SAMSUNG",
+    # china
+    "LFV": "VOLKSWAGEN", "LRW": "TESLA", "LVS": "FORD", "LYV": "VOLVO",
+    # mexico
+    "MAJ": "FORD",
+    # united kingdom
+    "SAJ": "JAGUAR", "SAL": "LAND ROVER", "SCA": "ROLLS ROYCE", "SCB": "BENTLEY",
+    "SCC": "LOTUS", "SCF": "ASTON MARTIN",
+    # germany
+    "WA1": "AUDI", "WAU": "AUDI", "WBA": "BMW", "WBS": "BMW", "WBX": "BMW", "WBY": "BMW",
+    "WDB": "MERCEDES-BENZ", "WDC": "MERCEDES-BENZ", "WDD": "MERCEDES-BENZ", "WDF": "MERCEDES-BENZ",
+    "W1K": "MERCEDES-BENZ", "W1N": "MERCEDES-BENZ", "W1V": "MERCEDES-BENZ",
+    "WMW": "MINI", "WP0": "PORSCHE", "WP1": "PORSCHE", "WVW": "VOLKSWAGEN", "WVG": "VOLKSWAGEN",
+    "WV1": "VOLKSWAGEN", "WV2": "VOLKSWAGEN", "W04": "BUICK", "W0L": "OPEL",
+    # italy, france, sweden
+    "ZAM": "MASERATI", "ZAR": "ALFA ROMEO", "ZFA": "FIAT", "ZFF": "FERRARI",
+    "ZHW": "LAMBORGHINI", "ZDM": "DUCATI", "VF1": "RENAULT", "VF3": "PEUGEOT",
+    "YV1": "VOLVO", "YV4": "VOLVO", "YS3": "SAAB",
+}
@@ -0,0 +1,34 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.db.database import Base, SQLALCHEMY_DATABASE_URL, engine
+import app.models  # noqa: F401  registers every table on Base.metadata
+
+config = context.config
+
+# the server runs migrations on startup and keeps its own logging configuration
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    # `alembic upgrade head --sql`: the DDL as a script, without a connection
+    context.configure(url=SQLALCHEMY_DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,137 @@
+"""initial schema
+
+Every table as it stood when migrations were introduced. Databases created before that, by
+Base.metadata.create_all and the startup patches, are adopted: missing tables and columns are
+added, the vehiclestep enum gets its vin_or_year_make_body value, and existing ones are left alone.
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001_initial_schema"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# created once up front: sessions and vehicles share licensetype and licensestatus
+ENUMS = {
+    "chatstep": ["zip_code", "full_name", "email", "vehicles", "license_type", "license_status"],
+    "vehiclestep": ["vin_or_year_make_body", "use", "blind_spot", "commuting_days", "commuting_miles", "annual_mileage"],
+    "licensetype": ["foreign", "personal", "commercial"],
+    "licensestatus": ["valid", "suspended"],
+    "vehicleuse": ["commuting", "commercial", "farming", "business"],
+    "sender": ["bot", "user"],
+}
+
+
+def _enum(name: str) -> sa.Enum:
+    return postgresql.ENUM(*ENUMS[name], name=name, create_type=False)
+
+
+def _json() -> sa.types.TypeEngine:
+    return sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def _tables():
+    # fresh columns on every call: a column belongs to one table once create_table or add_column has used it
+    return {
+        "sessions": [
+            sa.Column("session_id", sa.Integer(), primary_key=True, autoincrement=True, nullable=False),
+            sa.Column("current_step", _enum("chatstep"), nullable=False),
+            sa.Column("vehicle_step", _enum("vehiclestep"), nullable=True),
+            sa.Column("zip_code", sa.String(), nullable=True),
+            sa.Column("full_name", sa.String(), nullable=True),
+            sa.Column("email", sa.String(), nullable=True),
+            sa.Column("license_type", _enum("licensetype"), nullable=True),
+            sa.Column("license_status", _enum("licensestatus"), nullable=True),
+            sa.Column("summary", _json(), nullable=True),
+        ],
+        "vehicles": [
+            sa.Column("vehicle_id", sa.Integer(), primary_key=True, autoincrement=True, nullable=False),
+            sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.session_id"), nullable=False),
+            sa.Column("vin", sa.String(), nullable=True),
+            sa.Column("year", sa.Integer(), nullable=True),
+            sa.Column("make", sa.String(), nullable=True),
+            sa.Column("body_type", sa.String(), nullable=True),
+            sa.Column("vehicle_use", _enum("vehicleuse"), nullable=True),
+            sa.Column("blind_spot_warning_equipped", sa.Boolean(), nullable=True),
+            sa.Column("days_per_week", sa.Integer(), nullable=True),
+            sa.Column("one_way_miles", sa.Integer(), nullable=True),
+            sa.Column("annual_mileage", sa.Integer(), nullable=True),
+            sa.Column("license_type", _enum("licensetype"), nullable=True),
+            sa.Column("license_status", _enum("licensestatus"), nullable=True),
+        ],
+        "messages": [
+            sa.Column("message_id", sa.Integer(), primary_key=True, autoincrement=True, nullable=False),
+            sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.session_id"), nullable=False),
+            sa.Column("sender", _enum("sender"), nullable=False),
+            sa.Column("content", sa.String(), nullable=False),
+            sa.Column("idempotency_key", sa.String(255), nullable=True),
+        ],
+        "vin_decodes": [
+            sa.Column("vin", sa.String(17), primary_key=True, nullable=False),
+            sa.Column("valid", sa.Boolean(), nullable=False),
+            sa.Column("result", sa.JSON(), nullable=False),
+            sa.Column("decoded_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        ],
+        "llm_usage": [
+            sa.Column("usage_id", sa.Integer(), primary_key=True, autoincrement=True, nullable=False),
+            sa.Column("session_id", sa.Integer(), sa.ForeignKey("sessions.session_id"), nullable=True),
+            sa.Column("model", sa.String(), nullable=False),
+            sa.Column("prompt_version", sa.String(), nullable=False),
+            sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+            sa.Column("cached_tokens", sa.Integer(), nullable=False),
+            sa.Column("completion_tokens", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        ],
+    }
+
+# (table, name, columns, unique)
+INDEXES = [
+    ("messages", "ix_messages_session_idempotency_key", ["session_id", "idempotency_key"], True),
+    ("llm_usage", "ix_llm_usage_session_id", ["session_id"], False),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # `alembic upgrade head --sql` has no database to look at and writes the script for an empty one
+    offline = op.get_context().as_sql
+    if bind.dialect.name == "postgresql":
+        for name, values in ENUMS.items():
+            postgresql.ENUM(*values, name=name).create(bind, checkfirst=not offline)
+        # the value was added after vehiclestep was first created
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE vehiclestep ADD VALUE IF NOT EXISTS 'vin_or_year_make_body'")
+
+    existing_tables = set() if offline else set(sa.inspect(bind).get_table_names())
+    for table_name, columns in _tables().items():
+        if table_name not in existing_tables:
+            op.create_table(table_name, *columns)
+            continue
+        existing_columns = {column["name"] for column in sa.inspect(bind).get_columns(table_name)}
+        for column in columns:
+            if column.name not in existing_columns:
+                op.add_column(table_name, column)
+
+    for table_name, name, columns, unique in INDEXES:
+        existing_indexes = set() if offline else {index["name"] for index in sa.inspect(bind).get_indexes(table_name)}
+        if name not in existing_indexes:
+            op.create_index(name, table_name, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for table_name, name, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table_name)
+    for table_name in reversed(list(_tables())):
+        op.drop_table(table_name)
+    if op.get_bind().dialect.name == "postgresql":
+        for name in ENUMS:
+            op.execute(f"DROP TYPE IF EXISTS {name}")
@@ -0,0 +1,38 @@
+"""hot query indexes
+
+Composite indexes for the queries every turn runs: a session's messages newest first, optionally
+of one sender, and a session's vehicles in order. Without them each is a scan of the whole table.
+On Postgres they are built concurrently, so a live database keeps taking writes meanwhile.
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002_hot_query_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, name, columns)
+INDEXES = [
+    ("messages", "ix_messages_session_message", ["session_id", "message_id"]),
+    ("messages", "ix_messages_session_sender_message", ["session_id", "sender", "message_id"]),
+    ("vehicles", "ix_vehicles_session_vehicle", ["session_id", "vehicle_id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for table_name, name, columns in INDEXES:
+            op.create_index(name, table_name, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table_name, name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table_name, if_exists=True, postgresql_concurrently=True)
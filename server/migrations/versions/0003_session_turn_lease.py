@@ -0,0 +1,26 @@
+"""session turn lease
+
+sessions.turn_lease_until: the lease a worker holds on a session while it runs a bot turn, in
+place of an advisory lock that kept a pooled connection checked out for the whole turn.
+
+Revision ID: 0003_session_turn_lease
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0003_session_turn_lease"
+down_revision: Union[str, Sequence[str], None] = "0002_hot_query_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("turn_lease_until", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("sessions", "turn_lease_until")
@@ -0,0 +1,30 @@
+"""vin decode claims
+
+vin_decode_claims: the claim a worker holds on decoding a vin while it calls vPIC, in place of an
+advisory lock that kept a pooled connection checked out for the whole call.
+
+Revision ID: 0004_vin_decode_claims
+Revises: 0003_session_turn_lease
+Create Date: 2026-10-18
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0004_vin_decode_claims"
+down_revision: Union[str, Sequence[str], None] = "0003_session_turn_lease"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "vin_decode_claims",
+        sa.Column("vin", sa.String(17), primary_key=True, nullable=False),
+        sa.Column("claimed_until", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("vin_decode_claims")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Golden corpus check and micro-benchmark for the answer classifiers.
+
+    python scripts/bench_classifiers.py            # check the corpus, then time every classifier
+    python scripts/bench_classifiers.py --check    # corpus only; exits 1 on any mismatch
+
+Each line of classifier_corpus.jsonl is {"classifier", "text", "args"?, "value", "confidence"}: what
+app.services.classifiers.<classifier>(text, **args) must return. Add a line when an answer is
+misclassified, before changing the classifier.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add the server directory to Python path
+server_dir = Path(__file__).parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.insert(0, str(server_dir))
+
+from app.services import classifiers
+
+CORPUS_PATH = Path(__file__).parent / "classifier_corpus.jsonl"
+
+
+def load_corpus():
+    with open(CORPUS_PATH) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def classify(case):
+    return getattr(classifiers, case["classifier"])(case["text"], **case.get("args", {}))
+
+
+def check(corpus) -> int:
+    failures = 0
+    for case in corpus:
+        result = classify(case)
+        if result.value != case["value"] or result.confidence != case["confidence"]:
+            failures += 1
+            print(f"MISMATCH {case['classifier']}({case['text']!r}): got {result.value!r} ({result.confidence}), expected {case['value']!r} ({case['confidence']})")
+    print(f"{len(corpus) - failures}/{len(corpus)} corpus cases pass")
+    return failures
+
+
+def bench(corpus, iterations: int):
+    by_classifier = defaultdict(list)
+    for case in corpus:
+        by_classifier[case["classifier"]].append(case)
+    for name, cases in by_classifier.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for case in cases:
+                classify(case)
+        elapsed = time.perf_counter() - start
+        calls = iterations * len(cases)
+        print(f"{name:<20} {elapsed / calls * 1e6:8.2f} us/op  ({calls / elapsed:,.0f} ops/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="only check the corpus")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    failures = check(corpus)
+    if not args.check:
+        bench(corpus, args.iterations)
+    sys.exit(1 if failures else 0)
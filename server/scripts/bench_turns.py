@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Cost of a scripted conversation per bot turn: LLM completions and SQL statements.
+
+Runs offline against a throwaway SQLite database with the stub LLM provider and the
+offline vPIC mode, so the numbers only reflect how the turn itself is driven. Prints them next
+to BASELINE and exits 1 when the conversation did not end with what it answered.
+
+    python scripts/bench_turns.py            # POST /chat/{id}/bot/new
+    python scripts/bench_turns.py --stream   # POST /chat/{id}/bot/stream
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the server directory to Python path
+server_dir = Path(__file__).parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.insert(0, str(server_dir))
+
+# must be set before the app reads its config
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_turns.db")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("VPIC_MODE", "offline")
+os.environ.setdefault("FAST_PATH_ENABLED", "false")
+
+import httpx
+from sqlalchemy import event
+
+from app.db import migrations
+from app.db.database import async_engine, engine
+from app.main import app
+from app.services import llm_usage
+
+CONVERSATION = [
+    "94107",
+    "Jane Doe",
+    "jane@example.com",
+    "yes",
+    "1HGCM82633A004352",
+    "commuting",
+    "yes",
+    "5",
+    "12",
+    "yes",
+    "1N4AL3AP8JC231503",
+    "business",
+    "no",
+    "15000",
+    "no",
+    "personal",
+    "valid",
+]
+
+# both vins decode offline (their wmis are in the bundled table); what the session must end with
+EXPECTED_SESSION = {"current_step": "license_status", "license_type": "personal", "license_status": "valid", "complete": True}
+EXPECTED_VEHICLES = [
+    {"vin": "1HGCM82633A004352", "vehicle_use": "commuting", "blind_spot_warning_equipped": True, "days_per_week": 5, "one_way_miles": 12},
+    {"vin": "1N4AL3AP8JC231503", "vehicle_use": "business", "blind_spot_warning_equipped": False, "annual_mileage": 15000},
+]
+
+# the same conversation before turns were driven by the state machine in services/conversation.py
+# (an llm call to extract each answer, another to ask the next question; session re-read per step)
+BASELINE = {"llm_calls": 33, "queries": 442}
+
+_statements = 0
+
+
+def _count_statement(*args):
+    global _statements
+    _statements += 1
+
+
+def _completions() -> int:
+    return sum(llm_usage.stats()["completions"].values())
+
+
+async def bot_turn(client: httpx.AsyncClient, session_id: int, stream: bool) -> str:
+    if stream:
+        response = await client.post(f"/chat/{session_id}/bot/stream")
+        return response.text.rsplit("data: ", 1)[-1]
+    return (await client.post(f"/chat/{session_id}/bot/new")).text
+
+
+def _mismatches(summary: dict) -> list:
+    mismatches = [f"{field}: {summary.get(field)!r}, expected {value!r}" for field, value in EXPECTED_SESSION.items() if summary.get(field) != value]
+    vehicles = summary.get("vehicles", [])
+    if len(vehicles) != len(EXPECTED_VEHICLES):
+        return mismatches + [f"{len(vehicles)} vehicles, expected {len(EXPECTED_VEHICLES)}"]
+    for idx, (vehicle, expected) in enumerate(zip(vehicles, EXPECTED_VEHICLES), 1):
+        mismatches += [
+            f"vehicle {idx} {field}: {vehicle.get(field)!r}, expected {value!r}"
+            for field, value in expected.items() if vehicle.get(field) != value
+        ]
+    return mismatches
+
+
+async def run(stream: bool) -> int:
+    migrations.upgrade()
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count_statement)
+
+    rows = []
+    # no lifespan: the intro pool keeps its bundled greetings and nothing runs in the background
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        session_id = (await client.post("/chat/new")).json()
+        for user_message in [None] + CONVERSATION:
+            if user_message is not None:
+                await client.post(f"/chat/{session_id}/new", json={"content": user_message, "sender": "user"})
+            statements, completions = _statements, _completions()
+            start = time.perf_counter()
+            await bot_turn(client, session_id, stream)
+            rows.append((user_message or "(greeting)", _completions() - completions, _statements - statements, time.perf_counter() - start))
+        summary = (await client.get(f"/chat/{session_id}/summary")).json()
+
+    print(f"{'user message':<20} {'llm calls':>9} {'queries':>8} {'ms':>7}")
+    for user_message, completions, statements, elapsed in rows:
+        print(f"{user_message[:20]:<20} {completions:>9} {statements:>8} {elapsed * 1000:>7.1f}")
+    turns = len(rows)
+    total_completions = sum(r[1] for r in rows)
+    total_statements = sum(r[2] for r in rows)
+    print(f"{'total':<20} {total_completions:>9} {total_statements:>8}")
+    print(f"{'baseline':<20} {BASELINE['llm_calls']:>9} {BASELINE['queries']:>8}")
+    print(f"per turn: {total_completions / turns:.2f} llm calls, {total_statements / turns:.1f} queries, max {max(r[2] for r in rows)} queries")
+    print(f"baseline per turn: {BASELINE['llm_calls'] / turns:.2f} llm calls, {BASELINE['queries'] / turns:.1f} queries")
+
+    mismatches = _mismatches(summary)
+    for mismatch in mismatches:
+        print(f"FAIL {mismatch}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stream", action="store_true", help="drive turns through /bot/stream")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.stream)))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Lookup benchmark for the offline vPIC store.
+
+    python scripts/bench_vpic_lookup.py            # synthetic store with 10k makes
+    python scripts/bench_vpic_lookup.py --current  # whatever VPIC_STORE_PATH points at
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the server directory to Python path
+server_dir = Path(__file__).parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.insert(0, str(server_dir))
+
+from app.services import vpic_store
+
+BODY_CLASSES = ["Sedan/Saloon", "Coupe", "Pickup", "Sport Utility Vehicle (SUV)/Multi-Purpose Vehicle (MPV)", "Minivan"]
+
+
+def build_synthetic_store(num_makes: int) -> Path:
+    dump_dir = Path(tempfile.mkdtemp())
+    makes = [{"Make_ID": i, "Make_Name": f"MAKE {i}"} for i in range(1, num_makes + 1)]
+    bodies = [
+        {"Make_ID": i, "Body_Class": body, "Year_From": 1990, "Year_To": None}
+        for i in range(1, num_makes + 1) for body in random.sample(BODY_CLASSES, 3)
+    ]
+    (dump_dir / "makes.json").write_text(json.dumps(makes))
+    (dump_dir / "body_classes.json").write_text(json.dumps(bodies))
+
+    store_path = dump_dir / "vpic.sqlite3"
+    vpic_store.load_dump(dump_dir, store_path)
+    vpic_store.VPIC_STORE_PATH = store_path
+    return store_path
+
+
+def bench(name: str, fn, iterations: int):
+    fn() # warm the per-thread connection
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed / iterations * 1e6:8.1f} us/op  ({iterations / elapsed:,.0f} ops/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--current", action="store_true", help="benchmark the configured store instead of a synthetic one")
+    parser.add_argument("--makes", type=int, default=10000)
+    parser.add_argument("-n", "--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    if not args.current:
+        print(f"Built synthetic store at {build_synthetic_store(args.makes)}")
+    if not vpic_store.is_available():
+        sys.exit("No vPIC store found; run scripts/vpic_refresh.py first.")
+
+    names = list(vpic_store.iter_make_names())
+    make_id, _ = vpic_store.lookup_make(names[0])
+
+    bench("lookup_make (hit)", lambda: vpic_store.lookup_make(random.choice(names)), args.iterations)
+    bench("lookup_make (miss)", lambda: vpic_store.lookup_make("not a make"), args.iterations)
+    bench("validate_combination", lambda: vpic_store.validate_combination(make_id, 2019, "sedan"), args.iterations)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Checks that chatting after a fleet import adds the chat's vehicle next to the imported ones
+instead of overwriting one of them.
+
+Runs offline against a throwaway SQLite database with the stub LLM provider and the offline
+vPIC mode, like bench_turns.py. Exits 1 when the stored session is not what the chat collected.
+
+    python scripts/check_fleet_chat.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the server directory to Python path
+server_dir = Path(__file__).parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.insert(0, str(server_dir))
+
+# must be set before the app reads its config
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/check_fleet_chat.db")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+os.environ.setdefault("VPIC_MODE", "offline")
+
+import httpx
+
+from app.db import migrations
+from app.main import app
+
+# decodable offline: their wmis are in the bundled table
+IMPORTED_VIN = "1HGCM82633A004352"
+CHAT_VIN = "1N4AL3AP8JC231503"
+
+CONVERSATION = ["94107", "Jane Doe", "jane@example.com", "yes", CHAT_VIN, "commuting", "yes", "5", "12", "no", "personal", "valid"]
+
+
+async def run() -> list:
+    migrations.upgrade()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+        session_id = (await client.post("/chat/new")).json()
+        imported = (await client.post(f"/chat/{session_id}/vehicles/import", json={"vins": [IMPORTED_VIN]})).json()
+        await client.post(f"/chat/{session_id}/bot/new")
+        for content in CONVERSATION:
+            await client.post(f"/chat/{session_id}/turn", json={"content": content})
+        summary = (await client.get(f"/chat/{session_id}/summary")).json()
+
+    imported_row = imported["rows"][0]
+    vehicles = summary["vehicles"]
+    return [
+        ("fleet vehicle imported", imported["imported"] == 1),
+        ("chat added a second vehicle", len(vehicles) == 2),
+        ("fleet vehicle kept its vin", vehicles[0]["vin"] == IMPORTED_VIN),
+        ("fleet vehicle kept its year and make", (vehicles[0]["year"], vehicles[0]["make"]) == (imported_row["year"], imported_row["make"])),
+        ("chat vehicle has the chat's vin", len(vehicles) == 2 and vehicles[1]["vin"] == CHAT_VIN),
+        ("chat vehicle has its answers", len(vehicles) == 2 and (vehicles[1]["vehicle_use"], vehicles[1]["days_per_week"]) == ("commuting", 5)),
+        ("session complete", summary["complete"] and summary["license_status"] == "valid"),
+    ]
+
+
+def main() -> int:
+    checks = asyncio.run(run())
+    for description, passed in checks:
+        print(f"{'ok' if passed else 'FAIL':<5} {description}")
+    return 0 if all(passed for _, passed in checks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Checks that the hot message and vehicle queries are answered from their indexes, by EXPLAIN.
+
+Runs against SQLALCHEMY_DATABASE_URL after bringing it to the latest migration, or against a
+throwaway SQLite database when that is not set. On Postgres sequential scans are switched off
+for the check, so a small table still shows which index the planner would use once it is large.
+Exits 1 when a query does not use its index.
+
+    python scripts/check_query_plans.py
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the server directory to Python path
+server_dir = Path(__file__).parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.insert(0, str(server_dir))
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/check_query_plans.db")
+
+from sqlalchemy import func, select, text
+
+from app.config import CONTEXT_MAX_MESSAGES
+from app.db import migrations
+from app.db.database import engine
+from app.enums.sender import Sender
+from app.models.message import Message
+from app.models.vehicle import Vehicle
+
+SESSION_ID = 1
+
+# (what the query is for, the query, the indexes that may answer it)
+QUERIES = [
+    (
+        "turn context message window",
+        select(Message).where(Message.session_id == SESSION_ID).order_by(Message.message_id.desc()).limit(CONTEXT_MAX_MESSAGES),
+        ["ix_messages_session_message"],
+    ),
+    (
+        "last message id",
+        select(Message.message_id).where(Message.session_id == SESSION_ID).order_by(Message.message_id.desc()).limit(1),
+        ["ix_messages_session_message"],
+    ),
+    (
+        "message count by sender",
+        select(func.count()).select_from(Message).where(Message.session_id == SESSION_ID, Message.sender == Sender.bot),
+        ["ix_messages_session_sender_message"],
+    ),
+    (
+        "last message by sender",
+        select(Message).where(Message.session_id == SESSION_ID, Message.sender == Sender.user).order_by(Message.message_id.desc()).limit(1),
+        ["ix_messages_session_sender_message"],
+    ),
+    (
+        "all messages of a session",
+        select(Message).where(Message.session_id == SESSION_ID).order_by(Message.message_id),
+        ["ix_messages_session_message"],
+    ),
+    (
+        "vehicles of a session",
+        select(Vehicle).where(Vehicle.session_id == SESSION_ID).order_by(Vehicle.vehicle_id),
+        ["ix_vehicles_session_vehicle"],
+    ),
+    (
+        "latest vehicle of a session",
+        select(Vehicle).where(Vehicle.session_id == SESSION_ID).order_by(Vehicle.vehicle_id.desc()).limit(1),
+        ["ix_vehicles_session_vehicle"],
+    ),
+]
+
+
+def _plan(connection, statement) -> str:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    if connection.dialect.name == "postgresql":
+        rows = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return json.dumps(rows if not isinstance(rows, str) else json.loads(rows), indent=1)
+    return "\n".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def main() -> int:
+    migrations.upgrade()
+    failures = 0
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        for description, statement, indexes in QUERIES:
+            plan = _plan(connection, statement)
+            used = [index for index in indexes if index in plan]
+            print(f"{'ok' if used else 'FAIL':<5} {description:<30} {used[0] if used else ', '.join(indexes) + ' not used'}")
+            if not used:
+                failures += 1
+                print("      " + plan.replace("\n", "\n      "))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Rebuilds the offline vPIC store (VPIC_STORE_PATH) from a dump directory.
+
+    python scripts/vpic_refresh.py path/to/dump
+    python scripts/vpic_refresh.py path/to/dump --download   # refresh makes.json from vPIC first
+
+See app/services/vpic_store.py for the expected dump files.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add the server directory to Python path
+server_dir = Path(__file__).parent.parent
+if str(server_dir) not in sys.path:
+    sys.path.insert(0, str(server_dir))
+
+from app.services import http_client, vpic_store
+from app.services.makes_index import GET_ALL_MAKES_URL
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dump_dir", type=Path)
+    parser.add_argument("--download", action="store_true", help="download makes.json from vPIC before loading")
+    parser.add_argument("--store", type=Path, default=vpic_store.VPIC_STORE_PATH)
+    args = parser.parse_args()
+
+    if args.download:
+        args.dump_dir.mkdir(parents=True, exist_ok=True)
+        response = http_client.get(GET_ALL_MAKES_URL, timeout=30)
+        response.raise_for_status()
+        with open(args.dump_dir / "makes.json", "w") as f:
+            json.dump(response.json(), f)
+
+    counts = vpic_store.load_dump(args.dump_dir, args.store)
+    print(f"Loaded {args.store}: " + ", ".join(f"{count} {table}" for table, count in counts.items()))